@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus generator for the benchmarks.
+
+Writes a reproducible mix of Word, PDF, CSV and image files with realistic
+names and text, so extraction and analysis can be timed on any machine
+without real documents. The same seed always produces the same files.
+
+Usage: python benchmarks/corpus.py DIRECTORY [--count 500] [--size-kb 64] [--kinds docx,pdf,csv,png,jpg,gif]
+"""
+
+import argparse
+import os
+import random
+import struct
+import zipfile
+import zlib
+
+KINDS = ["docx", "pdf", "csv", "png", "jpg", "gif"]
+
+TOPICS = ["Budget", "Facilities", "Hiring", "Safety", "Marketing", "Research", "Procurement", "Training",
+          "Compliance", "Outreach", "Operations", "Grants"]
+TITLES = ["Quarterly Report", "Meeting Minutes", "Project Proposal", "Policy Memo", "Status Update",
+          "Board Agenda", "Vendor Agreement", "Annual Summary", "Action Plan", "Survey Results"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+          "November", "December"]
+WORDS = ("the committee reviewed project budget schedule staff vendor contract timeline report outcome data "
+         "survey analysis proposal approval funding department meeting action item follow up risk review "
+         "quarter annual plan goal target result update policy change request facility training safety").split()
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+def make_text(rng, title, size):
+    """Return about size characters of document text: a title, a dated line and filler paragraphs."""
+    date = f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2019, 2025)}"
+    lines = [title, f"Date: {date}", ""]
+    length = sum(len(line) + 1 for line in lines)
+    while length < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        lines.append(line)
+        length += len(line) + 1
+    return lines
+
+def xml_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def write_docx(path, rng, title, size):
+    """Write a minimal Word document; about half the size is text and the rest an embedded image."""
+    lines = make_text(rng, title, size // 2)
+    body = "".join(f"<w:p><w:r><w:t>{xml_escape(line)}</w:t></w:r></w:p>" for line in lines)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="png" ContentType="image/png"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                         '</Types>')
+        archive.writestr("_rels/.rels",
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+                         '</Relationships>')
+        archive.writestr("word/document.xml",
+                         f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{WORD_NAMESPACE}">'
+                         f'<w:body>{body}</w:body></w:document>')
+        # Stored uncompressed, like the photos that make real documents large
+        archive.writestr("word/media/image1.png", png_bytes(rng, size // 2), zipfile.ZIP_STORED)
+
+def pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, rng, title, size):
+    """Write a minimal text PDF with as many pages as it takes to reach about size bytes."""
+    lines = make_text(rng, title, size)
+    pages = [lines[i:i + 45] for i in range(0, len(lines), 45)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        text = "".join(f"({pdf_escape(line)}) Tj T* " for line in page)
+        stream = f"BT /F1 10 Tf 14 TL 50 750 Td {text}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(output)
+
+def write_csv(path, rng, title, size):
+    rows = ["date,category,item,amount"]
+    length = len(rows[0])
+    while length < size:
+        row = (f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+               f"{rng.choice(TOPICS)},{rng.choice(WORDS)},{rng.randint(10, 99999)}.{rng.randint(0, 99):02d}")
+        rows.append(row)
+        length += len(row) + 1
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows) + "\n")
+
+def png_bytes(rng, size):
+    """Return a valid PNG header padded with noise to about size bytes."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    header = chunk(b"IHDR", struct.pack(">IIBBBBB", 64, 64, 8, 2, 0, 0, 0))
+    noise = rng.randbytes(max(0, size - 64))
+    return b"\x89PNG\r\n\x1a\n" + header + chunk(b"tEXt", b"Comment\x00" + noise) + chunk(b"IEND", b"")
+
+def write_image(path, rng, title, size):
+    extension = os.path.splitext(path)[1]
+    if extension == ".png":
+        data = png_bytes(rng, size)
+    elif extension == ".jpg":
+        data = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00" + rng.randbytes(size) + b"\xff\xd9"
+    else:
+        data = b"GIF89a\x40\x00\x40\x00\x00\x00\x00" + rng.randbytes(size) + b"\x3b"
+    with open(path, "wb") as f:
+        f.write(data)
+
+WRITERS = {"docx": write_docx, "pdf": write_pdf, "csv": write_csv, "png": write_image, "jpg": write_image,
+           "gif": write_image}
+
+def generate_corpus(directory, count=500, size_kb=64, kinds=None, seed=0):
+    """Write count files of about size_kb each into directory, cycling through kinds. Returns their paths."""
+    kinds = kinds or KINDS
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        title = f"{rng.choice(TOPICS)} {rng.choice(TITLES)}"
+        path = os.path.join(directory, f"{title} {i}.{kind}")
+        # Sizes vary around the target so per-file timings have a realistic spread
+        size = max(256, int(size_kb * 1024 * rng.uniform(0.5, 1.5)))
+        WRITERS[kind](path, rng, title, size)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus for the benchmarks.")
+    parser.add_argument("directory", help="Directory to write the files into")
+    parser.add_argument("--count", type=int, default=500, help="Number of files (default: 500)")
+    parser.add_argument("--size-kb", type=int, default=64, help="Average file size in KB (default: 64)")
+    parser.add_argument("--kinds", default=",".join(KINDS), help=f"Comma-separated file types (default: {','.join(KINDS)})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in WRITERS]
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(unknown)}")
+    paths = generate_corpus(args.directory, args.count, args.size_kb, kinds, args.seed)
+    print(f"Wrote {len(paths)} files to {args.directory}")
+
+if __name__ == "__main__":
+    main()
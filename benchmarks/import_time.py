@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Cold-start import budget for the renamer entry points.
+
+Imports each module in a fresh interpreter with python -X importtime, prints
+the total import time and the slowest modules, and fails if the time is over
+budget or if a heavy dependency that should only be loaded on first use
+(the Anthropic SDK, httpx, PyPDF2) was imported at startup.
+
+Usage: python benchmarks/import_time.py [--budget-ms 150] [--repeat 5] [--top 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points whose startup is measured
+MODULES = ["renamer_engine", "claude_renamer", "claude_renamer_gui"]
+
+# Dependencies that must only be imported lazily
+LAZY_MODULES = ["anthropic", "httpx", "PyPDF2", "asyncio", "multiprocessing"]
+
+def measure(module):
+    """Import module in a fresh interpreter. Returns (total_us, {name: cumulative_us}) from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # import time: self [us] | cumulative | imported package
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative.get(module, 0), cumulative
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of the renamer.")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum import time per entry point (default: 150)")
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per module; the fastest is reported (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to list (default: 10)")
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(str(e))
+            failed = True
+            continue
+        total_us, cumulative = min(runs, key=lambda run: run[0])
+        print(f"\n{module}: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.repeat})")
+
+        # Only top-level modules, so a package is not listed again for each of its submodules
+        slowest = sorted(((us, name) for name, us in cumulative.items() if "." not in name and name != module),
+                         reverse=True)[:args.top]
+        for us, name in slowest:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+        loaded = [name for name in LAZY_MODULES if name in cumulative]
+        if loaded:
+            print(f"  FAIL: imported at startup: {', '.join(loaded)}")
+            failed = True
+        if total_us / 1000 > args.budget_ms:
+            print("  FAIL: over budget")
+            failed = True
+
+    print("\nFAIL" if failed else "\nOK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Claude Messages API, for benchmarks.
+
+Answers POST /v1/messages with a well-formed naming suggestion (or a JSON
+array of them for batched prompts) after a configurable delay, and can be
+told to fail a share of requests with 500s or rate-limit them with 429s.
+Offline Message Batches jobs are served under /v1/messages/batches: a job
+is created, can be retrieved, and its results are listed once it has ended.
+Point the renamer at it with ANTHROPIC_BASE_URL; no API key is checked.
+
+Usage: python benchmarks/mock_server.py [--port 8765] [--latency 0.5] [--jitter 0.1]
+                                        [--error-rate 0.0] [--rate-limit-rate 0.0] [--batch-time 0]
+"""
+
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FORMS = ["RPT", "MEM", "PRO", "AGD", "MIN", "DAT", "IMG", "AGR", "SUM", "PLN"]
+
+class MockClaudeServer:
+    """Threaded HTTP server that imitates the Messages API with configurable latency and failures.
+
+    latency and jitter are in seconds; each response waits latency plus or
+    minus up to jitter. error_rate and rate_limit_rate are the shares of
+    requests answered with a 500 or a 429 (with a retry-after-ms header of
+    retry_after seconds). Batch jobs end batch_time seconds after they are
+    created; error_rate also applies to each request in a batch. Counts of
+    every kind of response are kept in stats.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, jitter=0.1, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=0.5, seed=0, batch_time=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.batch_time = batch_time
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "input_tokens": 0, "output_tokens": 0,
+                      "batches": 0, "batch_requests": 0}
+        self.batches = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _draw(self):
+        """Pick the outcome and delay of one request."""
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._rng.random()
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return 429, 0.0
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 500, delay
+            self.stats["ok"] += 1
+            return 200, delay
+
+    def _suggestion(self, filename, file_id=None):
+        with self._lock:
+            form = self._rng.choice(FORMS)
+            date = f"20{self._rng.randint(19, 25)}{self._rng.randint(1, 12):02d}{self._rng.randint(1, 28):02d}"
+            confidence = round(self._rng.uniform(0.4, 1.0), 2)
+        words = [word.capitalize() for word in re.findall(r"[A-Za-z]+", filename)] or ["Misc"]
+        suggestion = {
+            "subject": words[0],
+            "description": "".join(words[1:4]) or "Document",
+            "document_form": form,
+            "date": date,
+            "revision": "Rev0",
+            "confidence": confidence,
+            "reasoning": "Mock suggestion based on the filename.",
+        }
+        if file_id is not None:
+            suggestion = {"id": file_id, **suggestion}
+        return suggestion
+
+    def _reply(self, request):
+        """Build the assistant text for a Messages request."""
+        prompt = request["messages"][-1]["content"]
+        if isinstance(prompt, list):
+            prompt = "".join(block.get("text", "") for block in prompt)
+        files = re.findall(r"^File id: (\d+)\nFilename: (.*)$", prompt, re.MULTILINE)
+        if files:
+            payload = [self._suggestion(filename, int(file_id)) for file_id, filename in files]
+        else:
+            match = re.search(r"^Filename: (.*)$", prompt, re.MULTILINE)
+            payload = self._suggestion(match.group(1) if match else "file")
+        return f"```json\n{json.dumps(payload, indent=2)}\n```"
+
+    def _message(self, request, body_size):
+        """Build the Messages API response to a request and count its tokens."""
+        text = self._reply(request)
+        input_tokens = body_size // 4
+        output_tokens = len(text) // 4
+        with self._lock:
+            self.stats["input_tokens"] += input_tokens
+            self.stats["output_tokens"] += output_tokens
+            message_id = f"msg_mock_{self.stats['requests']}_{self.stats['batch_requests']}"
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "mock"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+        }
+
+    def _create_batch(self, requests):
+        """Answer every request of a new batch job up front and return the job's id."""
+        results = []
+        for request in requests:
+            with self._lock:
+                self.stats["batch_requests"] += 1
+                failed = self._rng.random() < self.error_rate
+            if failed:
+                result = {"type": "errored", "error": {"type": "error",
+                                                       "error": {"type": "api_error", "message": "Mock failure"}}}
+            else:
+                params = request["params"]
+                result = {"type": "succeeded", "message": self._message(params, len(json.dumps(params)))}
+            results.append({"custom_id": request["custom_id"], "result": result})
+        with self._lock:
+            self.stats["batches"] += 1
+            batch_id = f"msgbatch_mock_{self.stats['batches']}"
+            self.batches[batch_id] = {"created": time.time(), "results": results}
+        return batch_id
+
+    def _batch(self, batch_id):
+        """Describe a batch job the way the API does, or return None for an unknown id."""
+        job = self.batches.get(batch_id)
+        if job is None:
+            return None
+        ended = time.time() - job["created"] >= self.batch_time
+        outcomes = [entry["result"]["type"] for entry in job["results"]]
+        created = datetime.datetime.fromtimestamp(job["created"], datetime.timezone.utc)
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(outcomes),
+                "succeeded": outcomes.count("succeeded") if ended else 0,
+                "errored": outcomes.count("errored") if ended else 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": created.isoformat(),
+            "expires_at": (created + datetime.timedelta(days=1)).isoformat(),
+            "ended_at": datetime.datetime.now(datetime.timezone.utc).isoformat() if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+            def log_message(self, format, *args):
+                pass  # One line per request would drown the benchmark output
+
+            def send_json(self, status, body, headers=()):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def not_found(self):
+                self.send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:3] != ["v1", "messages", "batches"] or len(parts) not in (4, 5):
+                    self.not_found()
+                    return
+                batch = server._batch(parts[3])
+                if batch is None or (len(parts) == 5 and (parts[4] != "results" or batch["results_url"] is None)):
+                    self.not_found()
+                    return
+                if len(parts) == 4:
+                    self.send_json(200, batch)
+                    return
+                data = "".join(json.dumps(entry) + "\n" for entry in server.batches[parts[3]]["results"]).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-jsonl")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = self.path.split("?")[0]
+                if path == "/v1/messages/batches":
+                    batch_id = server._create_batch(json.loads(body)["requests"])
+                    self.send_json(200, server._batch(batch_id))
+                    return
+                if path != "/v1/messages":
+                    self.not_found()
+                    return
+                status, delay = server._draw()
+                time.sleep(delay)
+                if status == 429:
+                    self.send_json(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Mock rate limit"}},
+                                   [("retry-after-ms", str(int(server.retry_after * 1000)))])
+                    return
+                if status == 500:
+                    self.send_json(500, {"type": "error", "error": {"type": "api_error", "message": "Mock failure"}})
+                    return
+
+                self.send_json(200, server._message(json.loads(body), len(body)))
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Claude Messages API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before each response (default: 0.5)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random variation of the latency in seconds (default: 0.1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500 (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with a 429 (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry delay sent with each 429 in seconds (default: 0.5)")
+    parser.add_argument("--batch-time", type=float, default=0.0, help="Seconds before a batch job ends (default: 0)")
+    args = parser.parse_args()
+
+    server = MockClaudeServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                              args.retry_after, batch_time=args.batch_time)
+    print(f"Mock Claude API listening on {server.url}. Run the renamer with ANTHROPIC_BASE_URL={server.url}")
+    try:
+        server.start()
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Served {server.stats['requests']} requests: {server.stats['ok']} ok, {server.stats['errors']} errors, "
+              f"{server.stats['rate_limited']} rate limited")
+
+if __name__ == "__main__":
+    main()
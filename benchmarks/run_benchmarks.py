@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark scenarios for the renamer, run against the local mock Claude server.
+
+Each scenario generates a fresh synthetic corpus, starts a mock server with
+the scenario's latency and failure rates, and runs one analysis path in a
+separate process so its peak memory is measured on its own. The report
+shows throughput, p50/p95/p99 latency per stage (scan, extract, prompt,
+api, parse, rename) as recorded by the engine's RunMetrics, and peak RSS. Results can be saved with --output and compared against an
+earlier run with --baseline.
+
+Usage: python benchmarks/run_benchmarks.py [--scenario NAME ...] [--files N] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import KINDS, generate_corpus
+from mock_server import MockClaudeServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings every scenario starts from
+DEFAULTS = {
+    "mode": "pipeline",          # extract, threaded or pipeline
+    "files": 200,
+    "size_kb": 64,
+    "kinds": KINDS,
+    "latency": 0.2,
+    "jitter": 0.05,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 0.2,
+    "workers": 8,
+    "extract_workers": 1,
+    "batch_tokens": 0,
+    "rename": True,
+    "cascade": False,
+}
+
+SCENARIOS = {
+    "extract": {"mode": "extract", "files": 600, "description": "Text extraction only, no API calls"},
+    "threaded": {"mode": "threaded", "description": "create_file_tree with 8 worker threads"},
+    "batched": {"mode": "threaded", "workers": 4, "batch_tokens": 4000,
+                "description": "create_file_tree packing several files per request"},
+    "pipeline": {"description": "Asyncio RenamePipeline with 8 requests in flight"},
+    "rate-limited": {"rate_limit_rate": 0.2, "description": "Pipeline with 20% of requests answered 429"},
+    "flaky": {"error_rate": 0.05, "description": "Pipeline with 5% of requests failing with a 500"},
+    "cascade": {"cascade": True, "description": "Pipeline naming files with a fast model and escalating doubtful ones"},
+    "large-files": {"files": 100, "size_kb": 1024, "kinds": ["docx", "pdf"],
+                    "description": "Pipeline over 1 MB Word and PDF files"},
+}
+
+# Stages reported by the engine's RunMetrics, in pipeline order
+STAGES = ["scan", "extract", "prompt", "api", "parse", "rename"]
+
+def peak_rss_mb():
+    """Peak resident memory of this process and any extraction workers, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_scenario(config, directory, work_dir):
+    """Run one scenario in this process against the server in ANTHROPIC_BASE_URL and return its measurements."""
+    sys.path.insert(0, REPO_DIR)
+    import renamer_engine
+    from claude_client import create_async_client, create_client
+    from model_cascade import FAST_MODEL, ModelCascade
+    from rate_limiter import RateLimiter
+    from rename_journal import RenameJournal
+    from run_metrics import RunMetrics
+
+    metrics = RunMetrics()
+    # Rate limits are left to the mock server so the client is not the bottleneck
+    rate_limiter = RateLimiter(requests_per_minute=1000000, tokens_per_minute=10 ** 12)
+    journal = RenameJournal(os.path.join(work_dir, "renames.jsonl"))
+    cascade = None
+    if config["cascade"]:
+        cascade = ModelCascade([FAST_MODEL, renamer_engine.CLAUDE_MODEL], valid_forms=renamer_engine.DOCUMENT_FORMS)
+    mode = config["mode"]
+    start = time.perf_counter()
+    if mode == "extract":
+        files = renamer_engine.get_directory_summaries(directory, config["extract_workers"], force=True, metrics=metrics)
+    elif mode == "threaded":
+        client = create_client("benchmark", max_connections=config["workers"])
+        summaries = renamer_engine.iter_directory_summaries(directory, config["extract_workers"], force=True,
+                                                            metrics=metrics)
+        files = renamer_engine.create_file_tree(summaries, None, config["workers"], rate_limiter=rate_limiter,
+                                                client=client, batch_tokens=config["batch_tokens"], metrics=metrics,
+                                                cascade=cascade)
+        if config["rename"]:
+            renamer_engine.rename_files(directory, files, auto_yes=True, journal=journal, metrics=metrics)
+    elif mode == "pipeline":
+        import asyncio
+
+        async def run():
+            client = create_async_client("benchmark", max_connections=config["workers"])
+            try:
+                pipeline = renamer_engine.RenamePipeline(client, directory, config["workers"],
+                                                         extract_workers=config["extract_workers"],
+                                                         rate_limiter=rate_limiter, rename=config["rename"],
+                                                         journal=journal, metrics=metrics, cascade=cascade)
+                return await pipeline.run(renamer_engine.iter_candidates(directory, force=True, metrics=metrics))
+            finally:
+                await client.close()
+
+        files = asyncio.run(run())
+    else:
+        raise ValueError(f"Unknown mode {mode}")
+    wall = time.perf_counter() - start
+    journal.close()
+
+    summary = metrics.summary(rate_limiter)
+    return {
+        "files": len(files),
+        "wall_s": wall,
+        "files_per_s": len(files) / wall if wall > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": summary["stages"],
+        "fallbacks": summary["events"].get("fallbacks", 0),
+        "escalated": summary["events"].get("escalated", 0),
+        "retries": rate_limiter.retries,
+        "input_tokens": rate_limiter.input_tokens,
+        "output_tokens": rate_limiter.output_tokens,
+    }
+
+def benchmark(name, config):
+    """Generate the corpus and mock server for one scenario and run it in a child process."""
+    with tempfile.TemporaryDirectory(prefix="renamer_bench_") as work_dir:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        generate_corpus(corpus_dir, config["files"], config["size_kb"], config["kinds"])
+        result_path = os.path.join(work_dir, "result.json")
+        with MockClaudeServer(latency=config["latency"], jitter=config["jitter"], error_rate=config["error_rate"],
+                              rate_limit_rate=config["rate_limit_rate"], retry_after=config["retry_after"]) as server:
+            env = dict(os.environ, ANTHROPIC_BASE_URL=server.url, ANTHROPIC_API_KEY="benchmark")
+            # The engine prints a line per file, so its output is discarded
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child-config", json.dumps(config),
+                 "--child-dir", corpus_dir, "--child-result", result_path],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if child.returncode != 0:
+                raise RuntimeError(f"Scenario {name} failed:\n{child.stderr}")
+            with open(result_path) as f:
+                result = json.load(f)
+            result["server"] = dict(server.stats)
+    result["scenario"] = name
+    result["config"] = config
+    return result
+
+def format_ms(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+def print_result(result):
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    print(f"\n{result['scenario']}: {result['config'].get('description', '')}")
+    print(f"  {result['files']} files in {result['wall_s']:.2f}s = {result['files_per_s']:.1f} files/s, peak RSS {rss}")
+    server = result["server"]
+    if server["requests"]:
+        print(f"  {server['requests']} requests ({server['rate_limited']} rate limited, {server['errors']} errors), "
+              f"{result['retries']} retries, {result['fallbacks']} fallback names, "
+              f"{result.get('escalated', 0)} escalated")
+    print(f"  {'stage':<8} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'total s':>8}")
+    for stage in STAGES:
+        stats = result["stages"].get(stage)
+        if stats:
+            print(f"  {stage:<8} {stats['count']:>6} {format_ms(stats['p50_ms'])} {format_ms(stats['p95_ms'])} "
+                  f"{format_ms(stats['p99_ms'])} {stats['total_s']:8.2f}")
+
+def change(new, old):
+    if not old or new is None:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+def print_comparison(results, baseline):
+    previous = {result["scenario"]: result for result in baseline}
+    print("\nCompared with baseline:")
+    print(f"  {'scenario':<14} {'files/s':>10} {'api p95':>10} {'peak RSS':>10}")
+    for result in results:
+        old = previous.get(result["scenario"])
+        if old is None:
+            print(f"  {result['scenario']:<14} {'(not in baseline)':>32}")
+            continue
+        api, old_api = result["stages"].get("api", {}), old["stages"].get("api", {})
+        print(f"  {result['scenario']:<14} {change(result['files_per_s'], old['files_per_s']):>10} "
+              f"{change(api.get('p95_ms'), old_api.get('p95_ms')):>10} "
+              f"{change(result['peak_rss_mb'], old['peak_rss_mb']):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the renamer against a local mock Claude server.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run; can be repeated (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--files", type=int, help="Override the number of files in every scenario")
+    parser.add_argument("--size-kb", type=int, help="Override the average file size in every scenario")
+    parser.add_argument("--latency", type=float, help="Override the mock API latency in seconds")
+    parser.add_argument("--workers", type=int, help="Override the number of concurrent requests")
+    parser.add_argument("--extract-workers", type=int,
+                        help="Override the number of extraction processes")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results saved earlier with --output")
+    parser.add_argument("--child-config", help=argparse.SUPPRESS)
+    parser.add_argument("--child-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--child-result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_config:
+        result = run_scenario(json.loads(args.child_config), args.child_dir, os.path.dirname(args.child_result))
+        with open(args.child_result, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.list:
+        for name, scenario in SCENARIOS.items():
+            print(f"{name:<14} {scenario['description']}")
+        return 0
+
+    overrides = {key: value for key, value in [("files", args.files), ("size_kb", args.size_kb),
+                                               ("latency", args.latency), ("workers", args.workers),
+                                               ("extract_workers", args.extract_workers)] if value is not None}
+    results = []
+    for name in args.scenario or SCENARIOS:
+        config = {**DEFAULTS, **SCENARIOS[name], **overrides}
+        print(f"Running {name}...", flush=True)
+        try:
+            results.append(benchmark(name, config))
+        except RuntimeError as e:
+            print(str(e))
+            continue
+        print_result(results[-1])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    return 0 if len(results) == len(args.scenario or SCENARIOS) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+
+CHECKPOINT_FILENAME = ".claude_renamer_checkpoint.jsonl"
+
+class Checkpoint:
+    """Append-only journal of the suggestions completed during one analysis run.
+
+    Every suggestion is written as one JSON line and flushed to disk as soon
+    as it arrives, so a run that is killed part way through loses at most the
+    requests that were in flight. With resume set the journal left behind by
+    an interrupted run is loaded, and files whose path, size and mtime still
+    match an entry are not sent to Claude again; otherwise it is started over.
+    version identifies the prompt and model, and entries written under a
+    different one are ignored.
+    """
+
+    def __init__(self, directory_path, version, resume=False, path=None):
+        self.path = path or os.path.join(directory_path, CHECKPOINT_FILENAME)
+        self.version = str(version)
+        self._entries = self._load() if resume else {}
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self.resumed = 0
+
+    def _load(self):
+        entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short when the previous run died
+                    if entry.get("version") == self.version:
+                        entries[entry["path"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, relative_path, size, mtime):
+        """Return a copy of the journaled suggestion for a file, or None if it is missing or changed."""
+        entry = self._entries.get(relative_path)
+        if entry is None or entry["size"] != size or entry["mtime"] != mtime:
+            return None
+        with self._lock:
+            self.resumed += 1
+        return dict(entry["suggestion"])
+
+    def record(self, relative_path, size, mtime, suggestion):
+        """Append a suggestion to the journal; fallback names are not kept so they are retried."""
+        if not suggestion.get("claude_used"):
+            return
+        line = json.dumps({"version": self.version, "path": relative_path, "size": size, "mtime": mtime,
+                           "suggestion": suggestion})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Close and delete the journal once the run it covers has finished."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,44 @@
+# anthropic and httpx take most of a cold start to import, so they are only
+# loaded when the first client is created
+
+# Connection pool and timeout defaults - these can be customized
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+KEEPALIVE_EXPIRY = 30.0
+
+def create_client(api_key, max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT,
+                  connect_timeout=DEFAULT_CONNECT_TIMEOUT, max_retries=0):
+    """Create one long-lived Claude client with a keep-alive connection pool.
+
+    The client is meant to be created once per run and shared by every request
+    (and every worker thread), so TLS handshakes and sockets are reused instead
+    of being rebuilt for each file. Retries default to 0 because the rate
+    limiter already retries rate-limit, server and connection errors.
+    """
+    import anthropic
+    import httpx
+    http_client = anthropic.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+    return anthropic.Anthropic(api_key=api_key, http_client=http_client, max_retries=max_retries)
+
+def create_async_client(api_key, max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT,
+                        connect_timeout=DEFAULT_CONNECT_TIMEOUT, max_retries=0):
+    """Create the asyncio counterpart of create_client, with the same pool and timeout settings."""
+    import anthropic
+    import httpx
+    http_client = anthropic.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+    return anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client, max_retries=max_retries)
@@ -1,79 +1,29 @@
 import os
-import json
-import datetime
-import mimetypes
-import re
-import time
+import queue
 import threading
 import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext, messagebox
-from pathlib import Path
-import anthropic
-import docx2txt
-import PyPDF2
+from renamer_engine import (CLAUDE_MODEL, DOCUMENT_FORMS, PROMPT_VERSION, SUPPORTED_EXTENSIONS, RenamePipeline,
+                            smart_fallback_naming)
+from claude_client import create_async_client
+from checkpoint import Checkpoint
+from job_control import JobController
+from model_cascade import ModelCascade, FAST_MODEL
+from rename_journal import RenameJournal, default_journal_path
+from file_scanner import scan_files
+from naming_convention import NamingConventionValidator
+from rate_limiter import RateLimiter
+from run_metrics import RunMetrics
 
-# Constants for naming convention - these can be customized
-DOCUMENT_FORMS = {
-    "ACT": "Action Request",
-    "AGD": "Agenda",
-    "AGR": "Agreement",
-    "ANN": "Announcement",
-    "APP": "Application/Appendix",
-    "ART": "Article",
-    "BIO": "Biography",
-    "BRC": "Brochure",
-    "BRN": "Briefing Note",
-    "CHT": "Chart",
-    "COD": "Code",
-    "COF": "Configuration File",
-    "CON": "Contract",
-    "COV": "Cover Page",
-    "DFT": "Discussion Draft",
-    "DRT": "Directory",
-    "DWG": "Drawing",
-    "ETD": "Electronic Thesis",
-    "EXA": "Example",
-    "FCT": "Fact Sheet",
-    "FRM": "Form",
-    "GRA": "Grant",
-    "GUI": "Guidelines",
-    "IMG": "Image",
-    "INT": "Interview",
-    "INV": "Invoice",
-    "INX": "Index",
-    "LCT": "Lecture",
-    "LGL": "Legal Document",
-    "LOG": "Log File",
-    "LTR": "Letter",
-    "MEM": "Memo",
-    "MIN": "Minutes",
-    "MKT": "Marketing",
-    "MNL": "Manual",
-    "MTG": "Meeting notes",
-    "NSL": "Newsletter",
-    "PLN": "Plan",
-    "PMT": "Permit",
-    "POL": "Policy",
-    "PPR": "Paper",
-    "PRC": "Procedure/Process",
-    "PRF": "Profile",
-    "PRO": "Proposal",
-    "PRS": "Presentation",
-    "PRL": "Press Release",
-    "PST": "Poster",
-    "RPT": "Report",
-    "RVW": "Review",
-    "SCH": "Schedule",
-    "SPE": "Speech",
-    "SRY": "Survey",
-    "SUM": "Summary",
-    "SUP": "Supplement",
-    "TML": "Timeline",
-    "TOR": "Terms of Reference",
-    "YRB": "Year Book",
-    "DAT": "Data",
-    "COB": "Code Book"
-}
+# Glyphs for the tick column of the file list
+CHECKED = "\u2611"
+UNCHECKED = "\u2610"
+
+# Minimum time between applying queued worker updates to the window (about 30 redraws per second)
+UI_REFRESH_MS = 33
+
+# Rows inserted into the file list per event-loop turn
+ROW_CHUNK = 2000
 
 class FileRenamerGUI:
     def __init__(self, root):
@@ -85,16 +35,27 @@ class FileRenamerGUI:
         # Variables
         self.directory_var = tk.StringVar()
         self.api_key_var = tk.StringVar()
+        self.recursive_var = tk.BooleanVar(value=False)
+        self.force_var = tk.BooleanVar(value=False)
+        self.resume_var = tk.BooleanVar(value=True)
         self.status_var = tk.StringVar(value="Ready")
         self.progress_var = tk.DoubleVar(value=0.0)
         self.files_to_rename = []
         self.rename_suggestions = []
         
+        # Controls the analysis while one is running
+        self.job = None
+        
+        # Updates posted by worker threads, applied on the Tk thread by drain_ui_updates
+        self.ui_updates = queue.Queue()
+        
+        # Indices of the files the user unticked, and the pending job that fills the file list
+        self.unchecked = set()
+        self.populate_job = None
+        
         # Create GUI elements
         self.create_widgets()
-        
-        # Dictionary to track checkboxes
-        self.checkbox_vars = {}
+        self.root.after(UI_REFRESH_MS, self.drain_ui_updates)
         
     def create_widgets(self):
         # Main frame
@@ -125,24 +86,33 @@ class FileRenamerGUI:
         ttk.Label(dir_frame, text="Directory:").pack(side=tk.LEFT, padx=5)
         ttk.Entry(dir_frame, textvariable=self.directory_var, width=50).pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         ttk.Button(dir_frame, text="Browse", command=self.browse_directory).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(dir_frame, text="Include subfolders", variable=self.recursive_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(dir_frame, text="Include already renamed", variable=self.force_var).pack(side=tk.LEFT, padx=5)
         
         # File list
         files_frame = ttk.LabelFrame(main_frame, text="Files to Rename", padding="10")
         files_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # Scrollable canvas for the file list
-        self.canvas = tk.Canvas(files_frame)
-        scrollbar = ttk.Scrollbar(files_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        # One Treeview for the whole list; Tk only draws the rows in view, so it copes with tens of thousands of files
+        self.file_tree = ttk.Treeview(files_frame, columns=("selected", "current", "new_name", "reason"),
+                                      show="headings", selectmode="extended")
+        self.file_tree.heading("selected", text="")
+        self.file_tree.heading("current", text="Current Name")
+        self.file_tree.heading("new_name", text="New Name")
+        self.file_tree.heading("reason", text="Reason")
+        self.file_tree.column("selected", width=30, stretch=False, anchor=tk.CENTER)
+        self.file_tree.column("current", width=260, anchor=tk.W)
+        self.file_tree.column("new_name", width=320, anchor=tk.W)
+        self.file_tree.column("reason", width=400, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(files_frame, orient="vertical", command=self.file_tree.yview)
+        self.file_tree.configure(yscrollcommand=scrollbar.set)
         
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Frame inside the canvas for the file list
-        self.files_list_frame = ttk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.files_list_frame, anchor="nw")
+        self.file_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        self.files_list_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        # Click the first column, or press space on the highlighted rows, to tick or untick files
+        self.file_tree.bind("<Button-1>", self.on_file_tree_click)
+        self.file_tree.bind("<space>", lambda e: self.toggle_files([int(iid) for iid in self.file_tree.selection()]))
         
         # Buttons
         btn_frame = ttk.Frame(main_frame)
@@ -150,6 +120,10 @@ class FileRenamerGUI:
         
         ttk.Button(btn_frame, text="Scan Directory", command=self.scan_directory).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Analyze Files", command=self.analyze_files).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(btn_frame, text="Resume interrupted analysis", variable=self.resume_var).pack(side=tk.LEFT, padx=5)
+        self.pause_button = ttk.Button(btn_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=self.cancel_analysis).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Rename Selected Files", command=self.rename_files).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Select All", command=lambda: self.select_all(True)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Deselect All", command=lambda: self.select_all(False)).pack(side=tk.LEFT, padx=5)
@@ -180,25 +154,143 @@ class FileRenamerGUI:
             self.directory_var.set(directory)
     
     def log(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.post_update("log", message)
     
     def update_status(self, message, progress=None):
-        self.status_var.set(message)
-        if progress is not None:
-            self.progress_var.set(progress)
-        self.root.update_idletasks()
+        self.post_update("status", (message, progress))
+    
+    def call_in_ui(self, func, *args):
+        """Run func(*args) on the Tk thread, after the updates posted before it."""
+        self.post_update("call", (func, args))
+    
+    def post_update(self, kind, payload):
+        """Apply a UI update now on the Tk thread, or queue it for drain_ui_updates from a worker thread.
+
+        Tk must only be touched from the thread running mainloop, and queuing
+        means workers never wait for the window to redraw.
+        """
+        if threading.current_thread() is threading.main_thread():
+            self.apply_ui_updates([(kind, payload)])
+            self.root.update_idletasks()
+        else:
+            self.ui_updates.put((kind, payload))
+    
+    def drain_ui_updates(self):
+        """Apply everything the workers queued since the last drain, then reschedule.
+
+        Runs at most UI_REFRESH_MS apart, and updates are coalesced: the log gets
+        one insert per drain, only the latest status is shown and each file row is
+        set once, so a fast analysis costs the same number of redraws as a slow one.
+        """
+        updates = []
+        try:
+            while True:
+                updates.append(self.ui_updates.get_nowait())
+        except queue.Empty:
+            pass
+        if updates:
+            self.apply_ui_updates(updates)
+        self.root.after(UI_REFRESH_MS, self.drain_ui_updates)
+    
+    def apply_ui_updates(self, updates):
+        logs = []
+        status = None
+        progress = None
+        rows = {}
+        
+        def flush():
+            nonlocal status, progress
+            if logs:
+                self.log_text.insert(tk.END, "".join(f"{message}\n" for message in logs))
+                self.log_text.see(tk.END)
+                logs.clear()
+            if status is not None:
+                self.status_var.set(status)
+                status = None
+            if progress is not None:
+                self.progress_var.set(progress)
+                progress = None
+            for index, (new_name, reason) in rows.items():
+                self.set_file_row(index, new_name, reason)
+            rows.clear()
+        
+        for kind, payload in updates:
+            if kind == "log":
+                logs.append(payload)
+            elif kind == "status":
+                status = payload[0]
+                if payload[1] is not None:
+                    progress = payload[1]
+            elif kind == "row":
+                rows[payload[0]] = payload[1:]
+            elif kind == "call":
+                # Keep calls in order with the updates around them
+                flush()
+                func, args = payload
+                func(*args)
+        flush()
     
     def select_all(self, state):
-        for var in self.checkbox_vars.values():
-            var.set(state)
+        self.unchecked = set() if state else set(range(len(self.files_to_rename)))
+        mark = CHECKED if state else UNCHECKED
+        for iid in self.file_tree.get_children():
+            self.file_tree.set(iid, "selected", mark)
+    
+    def toggle_files(self, indices):
+        """Tick or untick files; if any of them is ticked they are all unticked."""
+        state = any(i not in self.unchecked for i in indices)
+        for i in indices:
+            if state:
+                self.unchecked.add(i)
+            else:
+                self.unchecked.discard(i)
+            if self.file_tree.exists(str(i)):
+                self.file_tree.set(str(i), "selected", UNCHECKED if state else CHECKED)
+    
+    def on_file_tree_click(self, event):
+        if self.file_tree.identify_region(event.x, event.y) != "cell" or self.file_tree.identify_column(event.x) != "#1":
+            return None
+        iid = self.file_tree.identify_row(event.y)
+        if iid:
+            self.toggle_files([int(iid)])
+        return "break"  # Don't change the highlighted rows
     
     def clear_file_list(self):
         # Clear the existing file list
-        for widget in self.files_list_frame.winfo_children():
-            widget.destroy()
-        self.checkbox_vars = {}
+        if self.populate_job is not None:
+            self.root.after_cancel(self.populate_job)
+            self.populate_job = None
+        self.file_tree.delete(*self.file_tree.get_children())
+        self.unchecked = set()
+        self.rename_suggestions = []
+    
+    def populate_file_list(self, next_index=None):
+        """Insert rows for files_to_rename a chunk per event-loop turn, so a large scan shows up at once.
+
+        Treeview walks its whole list to find the end on every insert, so after
+        the first chunk the remaining rows are added from the last one backwards
+        right after that chunk, which keeps each insert cheap however long the
+        list is.
+        """
+        total = len(self.files_to_rename)
+        head = min(ROW_CHUNK, total)
+        if next_index is None:
+            for i in range(head):
+                self.insert_file_row(i, tk.END)
+            next_index = total - 1
+        stop = max(head - 1, next_index - ROW_CHUNK)
+        for i in range(next_index, stop, -1):
+            self.insert_file_row(i, head)
+        self.populate_job = self.root.after(1, self.populate_file_list, stop) if stop >= head else None
+    
+    def insert_file_row(self, index, position):
+        file_info = self.files_to_rename[index]
+        self.file_tree.insert("", position, iid=str(index), values=(
+            UNCHECKED if index in self.unchecked else CHECKED,
+            file_info["relative_path"],
+            file_info.get("new_name", "(Not analyzed yet)"),
+            file_info.get("reason", ""),
+        ))
     
     def scan_directory(self):
         directory = self.directory_var.get()
@@ -215,53 +307,40 @@ class FileRenamerGUI:
         self.update_status("Scanning directory...", 0)
         self.log(f"Scanning directory: {directory}")
         
-        # Supported file extensions
-        supported_extensions = [
-            '.docx', '.doc',
-            '.xlsx', '.xls', '.csv',
-            '.pdf',
-            '.jpg', '.jpeg', '.png', '.gif'
-        ]
-        
         # Get files
         try:
             all_files = []
-            for item in os.listdir(directory):
-                file_path = os.path.join(directory, item)
-                if os.path.isfile(file_path):
-                    _, extension = os.path.splitext(file_path)
-                    if extension.lower() in supported_extensions:
-                        all_files.append(file_path)
+            skipped = 0
+            validator = None if self.force_var.get() else NamingConventionValidator(DOCUMENT_FORMS)
+            for file_path, relative_path, file_size, file_mtime in scan_files(directory, recursive=self.recursive_var.get()):
+                _, extension = os.path.splitext(file_path)
+                if extension.lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                # Skip files a previous run already renamed
+                if validator and validator.matches(os.path.basename(file_path)):
+                    skipped += 1
+                    continue
+                all_files.append((file_path, relative_path, extension.lower(), file_size, file_mtime))
+            
+            if skipped:
+                self.log(f"Skipped {skipped} files that already follow the naming convention")
             
             self.update_status(f"Found {len(all_files)} files", 50)
             self.log(f"Found {len(all_files)} supported files")
             
             # Display files in the UI
-            for i, file_path in enumerate(all_files):
-                filename = os.path.basename(file_path)
-                
-                # Create variable for checkbox
-                var = tk.BooleanVar(value=True)
-                self.checkbox_vars[file_path] = var
-                
-                # Create a frame for each file row
-                file_frame = ttk.Frame(self.files_list_frame)
-                file_frame.pack(fill=tk.X, pady=2)
-                
-                # Add checkbox
-                ttk.Checkbutton(file_frame, variable=var).pack(side=tk.LEFT, padx=5)
-                
-                # Add filename label
-                ttk.Label(file_frame, text=filename, width=40, anchor=tk.W).pack(side=tk.LEFT, padx=5)
-                
-                # Add a placeholder for the new name
-                ttk.Label(file_frame, text="(Not analyzed yet)", width=50, anchor=tk.W).pack(side=tk.LEFT, padx=5)
-                
-                self.files_to_rename.append({
+            self.files_to_rename = [
+                {
                     "path": file_path,
-                    "filename": filename,
-                    "frame": file_frame,
-                })
+                    "relative_path": relative_path,
+                    "filename": os.path.basename(file_path),
+                    "extension": extension,
+                    "size": file_size,
+                    "mtime": file_mtime,
+                }
+                for file_path, relative_path, extension, file_size, file_mtime in all_files
+            ]
+            self.populate_file_list()
             
             self.update_status(f"Ready to analyze {len(all_files)} files", 100)
             
@@ -270,285 +349,18 @@ class FileRenamerGUI:
             self.log(f"Error scanning directory: {str(e)}")
             messagebox.showerror("Error", f"Error scanning directory: {str(e)}")
     
-    def get_file_content(self, file_path):
-        """Extract text content from files based on their type."""
-        try:
-            file_extension = os.path.splitext(file_path)[1].lower()
-            
-            # Word documents
-            if file_extension in ['.docx', '.doc']:
-                try:
-                    return docx2txt.process(file_path)[:4000]  # First 4000 chars
-                except:
-                    return f"Word document: {os.path.basename(file_path)}"
-            
-            # PDF files
-            elif file_extension == '.pdf':
-                try:
-                    with open(file_path, 'rb') as file:
-                        pdf_reader = PyPDF2.PdfReader(file)
-                        text = ""
-                        # Get first 2 pages or all pages if fewer
-                        for page_num in range(min(2, len(pdf_reader.pages))):
-                            text += pdf_reader.pages[page_num].extract_text() + "\n"
-                        return text[:4000]  # First 4000 chars
-                except:
-                    return f"PDF document: {os.path.basename(file_path)}"
-            
-            # Excel/CSV files - just return filename for analysis
-            elif file_extension in ['.xlsx', '.xls', '.csv']:
-                return f"Spreadsheet: {os.path.basename(file_path)}"
-                
-            # Images - just return filename for analysis
-            elif file_extension in ['.jpg', '.jpeg', '.png', '.gif']:
-                return f"Image: {os.path.basename(file_path)}"
-                
-            # Other files - just return filename
-            else:
-                return f"File: {os.path.basename(file_path)}"
-                
-        except Exception as e:
-            return f"Error reading file {os.path.basename(file_path)}: {str(e)}"
-    
-    def extract_date_from_filename(self, filename):
-        """Extract date from filename if present."""
-        # Look for common date patterns
-        # Format: Month DD, YYYY
-        month_names = ["January", "February", "March", "April", "May", "June", "July", 
-                      "August", "September", "October", "November", "December"]
-        
-        # Try to find dates like "August 28, 2024" or "August+28,+2024"
-        for month in month_names:
-            pattern = fr'{month}\s*[\+_]?\s*(\d{{1,2}})[,\s\+_]+(\d{{4}})'
-            match = re.search(pattern, filename, re.IGNORECASE)
-            if match:
-                day = match.group(1)
-                year = match.group(2)
-                month_num = month_names.index(month) + 1
-                return f"{year}{month_num:02d}{int(day):02d}"
-        
-        # Look for YYYY-MM-DD or YYYY/MM/DD
-        date_pattern = r'(\d{4})[-/\s](\d{1,2})[-/\s](\d{1,2})'
-        match = re.search(date_pattern, filename)
-        if match:
-            year, month, day = match.groups()
-            return f"{year}{int(month):02d}{int(day):02d}"
-        
-        # Default to current date if no date found
-        today = datetime.datetime.now()
-        return today.strftime("%Y%m%d")
-    
-    def smart_fallback_naming(self, file_info):
-        """Create intelligent fallback naming based on filename analysis."""
-        filename = os.path.basename(file_info["path"])
-        extension = os.path.splitext(filename)[1].lower()
-        
-        # Extract useful information from filename
-        keywords = self.extract_keywords_from_filename(filename)
-        date_str = self.extract_date_from_filename(filename)
-        
-        # Determine subject, description, and doc type based on keywords and extension
-        if len(keywords) >= 2:
-            subject = keywords[0]
-            description = ''.join(word.capitalize() for word in keywords[1:min(4, len(keywords))])
-        else:
-            subject = keywords[0] if keywords else "Misc"
-            description = "Document"
-        
-        # Select document form based on content/extension
-        if extension in ['.xlsx', '.xls', '.csv']:
-            if any('application' in kw.lower() for kw in keywords):
-                doc_type = "APP"  # Application
-            elif any('data' in kw.lower() for kw in keywords):
-                doc_type = "DAT"  # Data
-            else:
-                doc_type = "DAT"  # Default for spreadsheets
-        elif extension in ['.docx', '.doc']:
-            if any(kw.lower() in ['report', 'reporting'] for kw in keywords):
-                doc_type = "RPT"  # Report
-            elif any(kw.lower() in ['memo', 'memorandum'] for kw in keywords):
-                doc_type = "MEM"  # Memo
-            elif any(kw.lower() in ['form'] for kw in keywords):
-                doc_type = "FRM"  # Form
-            else:
-                doc_type = "DOC"  # Default for Word docs
-        elif extension in ['.pdf']:
-            if any(kw.lower() in ['report'] for kw in keywords):
-                doc_type = "RPT"  # Report
-            else:
-                doc_type = "DOC"  # Default for PDFs
-        elif extension in ['.jpg', '.jpeg', '.png', '.gif']:
-            doc_type = "IMG"  # Image
-        else:
-            doc_type = "MIS"  # Miscellaneous
-        
-        # Create filename following the convention
-        new_name = f"{subject}_{description}_{doc_type}_{date_str}_Rev0{extension}"
-        
-        return {
-            "path": file_info["path"],
-            "new_name": new_name,
-            "reason": f"Smart fallback: Used {subject} as subject, {description} as description, {doc_type} as document type, and date {date_str}."
-        }
-    
-    def extract_keywords_from_filename(self, filename):
-        """Extract meaningful keywords from filename."""
-        # Remove file extension
-        name_without_ext = os.path.splitext(filename)[0]
-        
-        # Replace common separators with spaces
-        name_clean = re.sub(r'[_\+\-\.]', ' ', name_without_ext)
-        
-        # Split into words
-        words = name_clean.split()
-        
-        # Filter out common stop words and numbers
-        stop_words = ['the', 'and', 'or', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'with', 'by']
-        keywords = [word for word in words if word.lower() not in stop_words and not word.isdigit()]
-        
-        return keywords
-    
-    def create_claude_naming_suggestion(self, file_info, api_key):
-        """Use Claude to generate naming suggestion for a file."""
-        try:
-            client = anthropic.Anthropic(api_key=api_key)
-            
-            # Get file content
-            file_content = self.get_file_content(file_info["path"])
-            
-            # Create a tailored prompt for Claude
-            prompt = f"""I need help following a standardized file naming convention for a file.
-
-Key elements in a filename include:
-- Subject or Activity (required)
-- Description of what the document is (required)
-- Document Form (optional): Use form codes like MEM (Memo), RPT (Report), MKT (Marketing), etc.
-- Date in YYYYMMDD format (required)
-- Revision (required): Use 'Rev0' for first final version, letters A,B,C for drafts
-
-The filename format should be: Subject_Description_DocumentForm_YYYYMMDD_Rev#.extension
-
-For example: Project_RiskManagement_GUI_20150414_Rev0.pdf
-
-Available Document Form codes include:
-ACT (Action Request), AGD (Agenda), AGR (Agreement), ANN (Announcement), APP (Application/Appendix), ART (Article), BIO (Biography), BRC (Brochure), BRN (Briefing Note), CHT (Chart), COD (Code), COF (Configuration File), CON (Contract), COV (Cover Page), DFT (Discussion Draft), DRT (Directory), DWG (Drawing), ETD (Electronic Thesis), EXA (Example), FCT (Fact Sheet), FRM (Form), GRA (Grant), GUI (Guidelines), IMG (Image), INT (Interview), INV (Invoice), INX (Index), LCT (Lecture), LGL (Legal Document), LOG (Log File), LTR (Letter), MEM (Memo), MIN (Minutes), MKT (Marketing), MNL (Manual), MTG (Meeting notes), NSL (Newsletter), PLN (Plan), PMT (Permit), POL (Policy), PPR (Paper), PRC (Procedure/Process), PRF (Profile), PRO (Proposal), PRS (Presentation), PRL (Press Release), PST (Poster), RPT (Report), RVW (Review), SCH (Schedule), SPE (Speech), SRY (Survey), SUM (Summary), SUP (Supplement), TML (Timeline), TOR (Terms of Reference), YRB (Year Book), DAT (Data), COB (Code Book)
-
-Here is information about the file:
-Filename: {os.path.basename(file_info["path"])}
-File Type: {os.path.splitext(file_info["path"])[1]}
-Content Preview: {file_content[:2000] if len(file_content) > 0 else "No content available"}
-
-Please analyze this file and provide ONLY a JSON response with the following format:
-```json
-{{
-  "subject": "Brief subject/category",
-  "description": "CamelCaseDescriptionOfDocument",
-  "document_form": "XXX",
-  "date": "YYYYMMDD",
-  "revision": "Rev0",
-  "reasoning": "Brief explanation of why you chose these elements"
-}}
-```
-
-The date should be extracted from the file content or filename if available, otherwise use today's date.
-Choose the most appropriate document form code from the list based on content.
-Keep the subject and description concise but descriptive.
-"""
-
-            # Call Claude API with the prompt
-            message = client.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=1000,
-                temperature=0.0,
-                system="You are a file organization assistant that analyzes files and suggests appropriate names following specific naming conventions.",
-                messages=[
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Parse Claude's response
-            response_text = message.content[0].text
-            
-            # Extract JSON from response
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if not json_match:
-                # Try without the code block markers
-                json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-                
-            if json_match:
-                json_text = json_match.group(1)
-                suggestion = json.loads(json_text)
-                
-                # Create unique identifier for files that might have the same name
-                unique_id = ""
-                file_dir = os.path.dirname(file_info["path"])
-                extension = os.path.splitext(file_info["path"])[1]
-                new_name_base = f"{suggestion['subject']}_{suggestion['description']}_{suggestion['document_form']}_{suggestion['date']}_{suggestion['revision']}"
-                
-                # Check if a file with this name already exists and add unique ID if needed
-                i = 0
-                while os.path.exists(os.path.join(file_dir, f"{new_name_base}{unique_id}{extension}")):
-                    i += 1
-                    unique_id = f"_{i}"
-                
-                # Final new name with unique ID if needed
-                new_name = f"{new_name_base}{unique_id}{extension}"
-                
-                return {
-                    "path": file_info["path"],
-                    "new_name": new_name,
-                    "reason": suggestion['reasoning'],
-                    "claude_used": True
-                }
-            else:
-                self.log(f"Could not parse JSON from Claude's response for {os.path.basename(file_info['path'])}")
-                self.log(f"Claude's response: {response_text[:200]}...")
-                return self.smart_fallback_naming(file_info)
-                
-        except Exception as e:
-            self.log(f"Error with Claude API for {os.path.basename(file_info['path'])}: {str(e)}")
-            return self.smart_fallback_naming(file_info)
-    
     def update_file_row(self, index, new_name, reason):
         """Update the UI with a new filename suggestion."""
-        # Get the file frame
-        file_frame = self.files_to_rename[index]["frame"]
-        
-        # Find and update the label with the new name
-        children = file_frame.winfo_children()
-        if len(children) >= 3:  # Should have 3 widgets: checkbox, filename, new name
-            label = children[2]
-            label.config(text=new_name)
-            
-            # Add tooltip with reason
-            self.create_tooltip(label, reason)
+        self.post_update("row", (index, new_name, reason))
     
-    def create_tooltip(self, widget, text):
-        """Create a tooltip for a widget."""
-        def enter(event):
-            x, y, _, _ = widget.bbox("insert")
-            x += widget.winfo_rootx() + 25
-            y += widget.winfo_rooty() + 25
-            
-            # Create a toplevel window
-            self.tooltip = tk.Toplevel(widget)
-            self.tooltip.wm_overrideredirect(True)
-            self.tooltip.wm_geometry(f"+{x}+{y}")
-            
-            label = ttk.Label(self.tooltip, text=text, wraplength=400, 
-                              background="#ffffe0", relief="solid", borderwidth=1,
-                              padding=5)
-            label.pack()
-            
-        def leave(event):
-            if hasattr(self, "tooltip"):
-                self.tooltip.destroy()
-                
-        widget.bind("<Enter>", enter)
-        widget.bind("<Leave>", leave)
+    def set_file_row(self, index, new_name, reason):
+        # Keep it in the model too, for rows populate_file_list has not inserted yet
+        file_info = self.files_to_rename[index]
+        file_info["new_name"] = new_name
+        file_info["reason"] = reason
+        if self.file_tree.exists(str(index)):
+            self.file_tree.set(str(index), "new_name", new_name)
+            self.file_tree.set(str(index), "reason", reason)
     
     def analyze_files(self):
         """Analyze files with Claude and update the UI."""
@@ -563,49 +375,122 @@ Keep the subject and description concise but descriptive.
             messagebox.showerror("Error", "No files to analyze. Please scan a directory first.")
             return
         
+        if self.job is not None:
+            messagebox.showerror("Error", "An analysis is already running. Cancel it first.")
+            return
+        
         # Clear previous suggestions
         self.rename_suggestions = []
         
         # Start analysis in a separate thread
+        self.job = JobController()
+        self.pause_button.config(text="Pause")
         self.update_status("Starting analysis...", 0)
-        threading.Thread(target=self._analyze_files_thread, args=(api_key,), daemon=True).start()
+        threading.Thread(target=self._analyze_files_thread,
+                         args=(api_key, self.directory_var.get(), self.resume_var.get(), self.job), daemon=True).start()
+    
+    def toggle_pause(self):
+        """Pause the running analysis between requests, or resume it."""
+        if self.job is None:
+            return
+        if self.job.paused:
+            self.job.resume()
+            self.pause_button.config(text="Pause")
+            self.log("Analysis resumed")
+        else:
+            self.job.pause()
+            self.pause_button.config(text="Resume")
+            self.log("Analysis paused; requests already sent will still finish")
     
-    def _analyze_files_thread(self, api_key):
-        """Background thread for file analysis."""
+    def cancel_analysis(self):
+        """Stop the running analysis, keeping the suggestions it already has."""
+        if self.job is None:
+            return
+        self.job.cancel()
+        self.pause_button.config(text="Pause")
+        self.update_status("Cancelling, waiting for requests in flight...")
+    
+    def finish_analysis(self, suggestions):
+        self.rename_suggestions = suggestions
+        self.job = None
+        self.pause_button.config(text="Pause")
+    
+    def _analyze_files_thread(self, api_key, directory, resume, job):
+        """Background thread for file analysis, driven by the same pipeline as the CLI."""
         total_files = len(self.files_to_rename)
         self.update_status(f"Analyzing {total_files} files...", 0)
+        rate_limiter = RateLimiter()
+        metrics = RunMetrics()
+        
+        rows = {file_info["relative_path"]: i for i, file_info in enumerate(self.files_to_rename)}
+        suggestions = [None] * total_files
+        candidates = [
+            (file_info["path"], file_info["relative_path"], file_info["extension"], file_info["size"], file_info["mtime"])
+            for file_info in self.files_to_rename
+        ]
         
-        for i, file_info in enumerate(self.files_to_rename):
-            file_path = file_info["path"]
-            filename = file_info["filename"]
-            
-            # Update progress
-            progress = (i / total_files) * 100
-            self.update_status(f"Analyzing file {i+1}/{total_files}: {filename}", progress)
-            self.log(f"Analyzing {filename}...")
-            
+        def on_suggestion(count, file_info, suggestion):
+            i = rows[file_info["src_path"]]
+            suggestion = dict(suggestion, path=file_info["full_path"])
+            suggestions[i] = suggestion
+            self.update_status(f"Analyzed file {count+1}/{total_files}: {file_info['filename']}", ((count + 1) / total_files) * 100)
+            self.log(f"Analyzed {file_info['filename']}")
+            self.update_file_row(i, suggestion["new_name"], suggestion.get("reason", "No reason provided"))
+        
+        # Suggestions are journaled as they complete, so an interrupted analysis
+        # (including one started from the command line) can pick up where it stopped
+        # Same default cascade as the command line, so either can resume the other's checkpoint
+        cascade = ModelCascade([FAST_MODEL, CLAUDE_MODEL], valid_forms=DOCUMENT_FORMS)
+        checkpoint = Checkpoint(directory, f"{PROMPT_VERSION}:{cascade.key}", resume)
+        if len(checkpoint):
+            self.log(f"Resuming from a checkpoint of {len(checkpoint)} suggestions")
+        
+        async def analyze():
+            client = create_async_client(api_key)
             try:
-                # Use Claude to generate naming suggestion
-                suggestion = self.create_claude_naming_suggestion(file_info, api_key)
-                
-                # Add to suggestions list
-                self.rename_suggestions.append(suggestion)
-                
-                # Update UI with suggestion
-                self.update_file_row(i, suggestion["new_name"], suggestion.get("reason", "No reason provided"))
-                
-                # Small delay to avoid overwhelming the API
-                if i < total_files - 1:
-                    time.sleep(0.5)
-                    
-            except Exception as e:
-                self.log(f"Error processing {filename}: {str(e)}")
-                # Use fallback naming
-                fallback = self.smart_fallback_naming(file_info)
-                self.rename_suggestions.append(fallback)
-                self.update_file_row(i, fallback["new_name"], fallback.get("reason", "Fallback naming used"))
+                # Extract in threads: forking this process would copy the Tk interpreter and its threads
+                pipeline = RenamePipeline(client, directory, extract_workers=1, rate_limiter=rate_limiter,
+                                          on_suggestion=on_suggestion, checkpoint=checkpoint, controller=job,
+                                          metrics=metrics, cascade=cascade)
+                await pipeline.run(candidates)
+            finally:
+                await client.close()
+        
+        import asyncio  # Only needed once an analysis starts, so the window opens faster
+        try:
+            asyncio.run(analyze())
+        except Exception as e:
+            self.log(f"Error analyzing files: {str(e)}")
+            checkpoint.close()
+        else:
+            if job.cancelled:
+                checkpoint.close()  # Kept so the remaining files can be resumed
+            else:
+                checkpoint.discard()
+        
+        for line in metrics.report(rate_limiter):
+            self.log(line)
+        self.log(cascade.report())
+        
+        if job.cancelled:
+            # Files the cancel stopped before analysis are left without a name
+            analyzed = sum(1 for suggestion in suggestions if suggestion is not None)
+            self.call_in_ui(self.finish_analysis, suggestions)
+            self.update_status(f"Analysis cancelled. {analyzed} of {total_files} files analyzed.")
+            self.log("Analysis cancelled. Analyze again with \"Resume interrupted analysis\" ticked to continue.")
+            return
+        
+        # Files that could not be read or analyzed still get a fallback name
+        for i, file_info in enumerate(self.files_to_rename):
+            if suggestions[i] is None:
+                self.log(f"Error processing {file_info['filename']}, using fallback naming")
+                fallback = smart_fallback_naming({"src_path": file_info["relative_path"]})
+                suggestions[i] = dict(fallback, path=file_info["path"])
+                self.update_file_row(i, suggestions[i]["new_name"], suggestions[i].get("reason", "Fallback naming used"))
+        self.call_in_ui(self.finish_analysis, suggestions)
         
         self.update_status(f"Analysis complete. {total_files} files analyzed.", 100)
+        self.log(f"Rate limiter waited {rate_limiter.wait_time:.1f}s in total ({rate_limiter.retries} retries)")
         self.log("File analysis complete!")
     
     def rename_files(self):
@@ -617,10 +502,9 @@ Keep the subject and description concise but descriptive.
         
         # Get selected files
         selected_files = []
-        for i, file_info in enumerate(self.files_to_rename):
-            if self.checkbox_vars.get(file_info["path"], tk.BooleanVar(value=False)).get():
-                if i < len(self.rename_suggestions):
-                    selected_files.append(self.rename_suggestions[i])
+        for i, suggestion in enumerate(self.rename_suggestions):
+            if suggestion is not None and i not in self.unchecked:
+                selected_files.append(suggestion)
         
         if not selected_files:
             messagebox.showerror("Error", "No files selected for renaming.")
@@ -637,37 +521,40 @@ Keep the subject and description concise but descriptive.
             
         # Start renaming in a separate thread
         self.update_status(f"Renaming {len(selected_files)} files...", 0)
-        threading.Thread(target=self._rename_files_thread, args=(selected_files,), daemon=True).start()
+        threading.Thread(target=self._rename_files_thread, args=(selected_files, self.directory_var.get()),
+                         daemon=True).start()
     
-    def _rename_files_thread(self, files):
+    def _rename_files_thread(self, files, directory):
         """Background thread for file renaming."""
         total_files = len(files)
+        self.update_status(f"Renaming {total_files} files...", 0)
+        
+        # Apply every rename as one journaled plan so chains and swaps of names work and the run can be undone
+        journal = RenameJournal(default_journal_path(directory))
+        try:
+            errors = journal.apply([(file["path"], os.path.join(os.path.dirname(file["path"]), file["new_name"]))
+                                    for file in files])
+        finally:
+            journal.close()
+        
         success_count = 0
         error_count = 0
-        
-        for i, file in enumerate(files):
-            src_path = file["path"]
-            dir_name = os.path.dirname(src_path)
-            new_path = os.path.join(dir_name, file["new_name"])
-            
-            # Update progress
-            progress = (i / total_files) * 100
-            self.update_status(f"Renaming file {i+1}/{total_files}", progress)
-            
-            try:
-                # Check if destination file already exists (should be handled during suggestion creation)
-                if os.path.exists(new_path) and new_path != src_path:
-                    raise FileExistsError(f"A file with the name {file['new_name']} already exists.")
-                    
-                os.rename(src_path, new_path)
-                self.log(f"Renamed: {os.path.basename(src_path)} -> {file['new_name']}")
+        for file, error in zip(files, errors):
+            if error is None:
+                self.log(f"Renamed: {os.path.basename(file['path'])} -> {file['new_name']}")
                 success_count += 1
-            except Exception as e:
-                self.log(f"Error renaming {os.path.basename(src_path)}: {str(e)}")
+            else:
+                self.log(f"Error renaming {os.path.basename(file['path'])}: {str(error)}")
                 error_count += 1
+        if journal.moves:
+            self.log(f"To revert these renames run: python claude_renamer.py --undo \"{journal.path}\"")
         
         # Show summary
         self.update_status(f"Renaming complete. {success_count} succeeded, {error_count} failed.", 100)
+        self.call_in_ui(self.finish_rename, success_count, error_count)
+    
+    def finish_rename(self, success_count, error_count):
+        """Report a finished rename on the Tk thread and offer to rescan."""
         messagebox.showinfo(
             "Rename Complete", 
             f"Renamed {success_count} files successfully.\n{error_count} files failed."
@@ -0,0 +1,54 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Default number of characters extracted from each file
+DEFAULT_MAX_CHARS = 4000
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def extract_docx_text(file_path, max_chars=DEFAULT_MAX_CHARS):
+    """Extract the first max_chars characters of text from a Word document.
+
+    Only word/document.xml is read, streamed straight out of the zip, so
+    embedded images and other media are never decompressed. Parsing stops as
+    soon as the character budget is met.
+    """
+    parts = []
+    length = 0
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as document:
+            for event, element in ET.iterparse(document, events=("end",)):
+                if element.tag == f"{WORD_NAMESPACE}t":
+                    text = element.text or ""
+                elif element.tag == f"{WORD_NAMESPACE}tab":
+                    text = "\t"
+                elif element.tag in (f"{WORD_NAMESPACE}br", f"{WORD_NAMESPACE}p"):
+                    text = "\n"
+                else:
+                    continue
+                
+                parts.append(text)
+                length += len(text)
+                if length >= max_chars:
+                    break
+                # Paragraphs are finished; free them so memory stays flat on long documents
+                if element.tag == f"{WORD_NAMESPACE}p":
+                    element.clear()
+    return "".join(parts)[:max_chars]
+
+def extract_pdf_text(file_path, max_chars=DEFAULT_MAX_CHARS, max_pages=2):
+    """Extract the first max_chars characters of text from up to max_pages pages of a PDF.
+
+    Pages are extracted one at a time and extraction stops as soon as the
+    character budget is met, so later pages are never parsed.
+    """
+    import PyPDF2  # Slow to import, so only loaded once a PDF is actually read
+    text = ""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            text += (page.extract_text() or "") + "\n"
+            max_pages -= 1
+            if len(text) >= max_chars or max_pages <= 0:
+                break
+    return text[:max_chars]
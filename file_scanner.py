@@ -0,0 +1,51 @@
+import fnmatch
+import os
+
+def matches_any(relative_path, patterns):
+    """Check a relative path (or just its filename) against a list of glob patterns."""
+    filename = os.path.basename(relative_path)
+    return any(fnmatch.fnmatch(relative_path, pattern) or fnmatch.fnmatch(filename, pattern)
+               for pattern in patterns)
+
+def scan_files(directory_path, recursive=False, include=None, exclude=None, max_depth=None):
+    """Yield (file_path, relative_path, size, mtime) for every file under a directory.
+
+    Built on os.scandir so the stat results cached on each DirEntry are reused
+    instead of stat-ing every file again. Only the top level is scanned unless
+    recursive is set; max_depth limits how many levels of subdirectories are
+    entered. Hidden directories are never entered. include and exclude are
+    glob patterns matched against the path relative to directory_path (with
+    "/" separators) and against the bare filename.
+    """
+    stack = [(directory_path, "", 0)]
+    while stack:
+        current_dir, relative_dir, depth = stack.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error scanning {current_dir}: {str(e)}")
+            continue
+        
+        subdirectories = []
+        for entry in entries:
+            relative_path = f"{relative_dir}{entry.name}"
+            try:
+                if entry.is_dir():
+                    if recursive and not entry.name.startswith('.') and (max_depth is None or depth < max_depth):
+                        subdirectories.append((entry.path, f"{relative_path}/", depth + 1))
+                    continue
+                if not entry.is_file():
+                    continue
+                if include and not matches_any(relative_path, include):
+                    continue
+                if exclude and matches_any(relative_path, exclude):
+                    continue
+                stat = entry.stat()
+            except OSError as e:
+                print(f"Error reading {entry.path}: {str(e)}")
+                continue
+            yield entry.path, relative_path, stat.st_size, stat.st_mtime
+        
+        # Visit subdirectories in name order after the files of this directory
+        stack.extend(reversed(subdirectories))
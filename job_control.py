@@ -0,0 +1,72 @@
+import signal
+import threading
+from contextlib import contextmanager
+
+class JobController:
+    """Cancel, pause and resume for a running analysis.
+
+    The UI (or a signal handler) calls cancel, pause and resume; workers call
+    wait, or wait_async from the asyncio pipeline, before starting each new
+    request. wait blocks while the job is paused and returns False once it has
+    been cancelled, so requests already in flight finish and are kept, but no
+    new ones are started. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # Release anything waiting on a pause
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait(self):
+        """Block while paused. Returns True if work may continue, False if the job was cancelled."""
+        self._running.wait()
+        return not self.cancelled
+
+    async def wait_async(self, poll_interval=0.2):
+        """Like wait, without blocking the event loop."""
+        import asyncio
+        while not self._running.is_set():
+            await asyncio.sleep(poll_interval)
+        return not self.cancelled
+
+@contextmanager
+def cancel_on_sigint(controller):
+    """Turn the first Ctrl-C into controller.cancel(); a second one interrupts as usual.
+
+    Only has an effect on the main thread, where Python delivers signals.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield controller
+        return
+
+    def handle(signum, frame):
+        if controller.cancelled:
+            raise KeyboardInterrupt
+        print("\nCancelling: waiting for requests in flight, then keeping the finished results. "
+              "Press Ctrl-C again to stop immediately.")
+        controller.cancel()
+
+    previous = signal.signal(signal.SIGINT, handle)
+    try:
+        yield controller
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -0,0 +1,58 @@
+import json
+import os
+import sqlite3
+import time
+
+MANIFEST_FILENAME = ".claude_renamer_manifest.sqlite3"
+
+class Manifest:
+    """Record of the files renamed in one directory tree, used to skip them on re-runs.
+
+    Each entry stores a file's relative path, size, mtime, content hash and the
+    suggestion that was applied to it. A file whose size and mtime still match
+    its entry is unchanged and can be skipped with nothing more than the stat
+    the scanner already did. All entries are loaded into memory up front so
+    lookups cost no queries; changes are written when save or close is called.
+    """
+
+    def __init__(self, directory_path, path=None):
+        self.path = path or os.path.join(directory_path, MANIFEST_FILENAME)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                content_hash TEXT,
+                suggestion TEXT,
+                updated REAL NOT NULL
+            )""")
+        self._conn.commit()
+        self._entries = {
+            path: (size, mtime)
+            for path, size, mtime in self._conn.execute("SELECT path, size, mtime FROM files")
+        }
+
+    def __contains__(self, relative_path):
+        return relative_path in self._entries
+
+    def is_unchanged(self, relative_path, size, mtime):
+        """Check whether a file is recorded with the same size and mtime."""
+        return self._entries.get(relative_path) == (size, mtime)
+
+    def record(self, relative_path, size, mtime, content_hash=None, suggestion=None, old_path=None):
+        """Record a file, optionally replacing the entry it had under its old path."""
+        if old_path is not None and old_path != relative_path:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (old_path,))
+            self._entries.pop(old_path, None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime, content_hash, suggestion, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (relative_path, size, mtime, content_hash, json.dumps(suggestion) if suggestion else None, time.time()))
+        self._entries[relative_path] = (size, mtime)
+
+    def save(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
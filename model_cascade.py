@@ -0,0 +1,67 @@
+import threading
+
+# Small model that names every file first
+FAST_MODEL = "claude-3-haiku-20240307"
+
+# Suggestions with a lower confidence than this are escalated to the next model
+DEFAULT_ESCALATION_THRESHOLD = 0.7
+
+class ModelCascade:
+    """Tiered model routing: each file goes to the first model, and only doubtful answers move up.
+
+    models is ordered from the cheapest to the most capable model. A
+    suggestion is escalated to the next model when it could not be parsed,
+    uses a document form code that is not in valid_forms, or reports a
+    confidence below threshold. Files whose preview is only their filename
+    (images and spreadsheets) are not escalated on confidence alone, since a
+    larger model has nothing more to go on. The last model's answer is always
+    kept. A single-model cascade sends everything to that model. Per-model
+    counts are kept for the end-of-run report; safe to share between threads.
+    """
+
+    def __init__(self, models, threshold=DEFAULT_ESCALATION_THRESHOLD, valid_forms=None):
+        if not models:
+            raise ValueError("A model cascade needs at least one model")
+        self.models = list(models)
+        self.threshold = threshold
+        self.valid_forms = set(valid_forms) if valid_forms is not None else None
+        self.answered = {model: 0 for model in self.models}
+        self.escalated = {model: 0 for model in self.models}
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        """Identifies the models and threshold, for cache keys and checkpoint versions."""
+        if len(self.models) == 1:
+            return self.models[0]
+        return f"{'>'.join(self.models)}@{self.threshold:g}"
+
+    def should_escalate(self, tier, result, filename_only=False):
+        """Check whether the suggestion result from models[tier] should be passed to the next model."""
+        if tier >= len(self.models) - 1:
+            return False
+        if not result.get("claude_used"):
+            return True
+        if self.valid_forms is not None and result.get("document_form") not in self.valid_forms:
+            return True
+        if filename_only:
+            return False
+        confidence = result.get("confidence")
+        return confidence is None or confidence < self.threshold
+
+    def record(self, model, escalated=False):
+        """Count a file answered by model, or passed on by it when escalated is set."""
+        with self._lock:
+            counts = self.escalated if escalated else self.answered
+            counts[model] = counts.get(model, 0) + 1
+
+    def report(self):
+        """Return the per-model counts as a line of text."""
+        with self._lock:
+            total = sum(self.answered.values())
+            parts = [f"{self.answered[model]} by {model}" for model in self.models]
+            escalated = sum(self.escalated.values())
+        if len(self.models) == 1:
+            return f"Model: {parts[0]}"
+        share = f" ({escalated / (total or 1) * 100:.0f}%)" if total else ""
+        return f"Model cascade: {', '.join(parts)}; {escalated} escalated{share}"
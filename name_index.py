@@ -0,0 +1,70 @@
+import os
+import re
+
+class NameIndex:
+    """In-memory index of the file names taken in each directory during one run.
+
+    The first lookup in a directory lists it once with os.scandir; after that
+    every name handed out by reserve is added to the index, so resolving a
+    collision costs no syscalls and two files in the same run can never be
+    given the same name. Names are compared case-insensitively, so the result
+    is the same on case-sensitive and case-insensitive file systems. The next
+    free suffix is remembered per name, so many files mapping to the same
+    name are numbered _1, _2, ... in the order they are reserved without
+    rescanning the ones already taken.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._next_suffix = {}
+
+    def _names_in(self, directory):
+        names = self._names.get(directory)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        names.add(entry.name.casefold())
+            except OSError:
+                pass  # Nothing to collide with in a directory we cannot list
+            self._names[directory] = names
+        return names
+
+    def __contains__(self, path):
+        directory, name = os.path.split(path)
+        return name.casefold() in self._names_in(directory)
+
+    def reserve(self, directory, stem, extension, current_name=None):
+        """Return the first free name of stem + extension, adding _1, _2, ... as needed, and mark it taken.
+
+        current_name is the file's own name, which it may keep.
+        """
+        names = self._names_in(directory)
+        key = (directory, f"{stem}{extension}".casefold())
+        count = self._next_suffix.get(key, 0)
+        own = self._suffix_of(current_name, stem, extension)
+        if own is not None and own < count:
+            # Its own name comes before the next free suffix, so it keeps it (in the suggested case)
+            return f"{stem}{extension}" if own == 0 else f"{stem}_{own}{extension}"
+        while True:
+            name = f"{stem}{extension}" if count == 0 else f"{stem}_{count}{extension}"
+            if name.casefold() not in names:
+                break
+            if current_name is not None and name.casefold() == current_name.casefold():
+                break  # It's the same file, so no uniqueness is needed
+            count += 1
+        names.add(name.casefold())
+        self._next_suffix[key] = count + 1
+        return name
+
+    @staticmethod
+    def _suffix_of(name, stem, extension):
+        """Return 0 if name is stem + extension, N if it is stem_N + extension, otherwise None."""
+        if name is None:
+            return None
+        name = name.casefold()
+        if name == f"{stem}{extension}".casefold():
+            return 0
+        match = re.fullmatch(re.escape(stem.casefold()) + r"_([1-9][0-9]*)" + re.escape(extension.casefold()), name)
+        return int(match.group(1)) if match else None
@@ -0,0 +1,24 @@
+import datetime
+import re
+
+class NamingConventionValidator:
+    """Check whether a filename already follows Subject_Description_FRM_YYYYMMDD_Rev#.ext.
+
+    The pattern is compiled once from the allowed document form codes. Names
+    with a collision suffix (e.g. _Rev0_1.pdf) also count as conforming.
+    """
+
+    def __init__(self, document_forms):
+        form_codes = "|".join(re.escape(code) for code in sorted(document_forms))
+        self._pattern = re.compile(
+            r"^[^_]+_[^_]+_(?:" + form_codes + r")_(?P<date>\d{8})_Rev(?:\d+|[A-Z])(?:_\d+)?\.[^._]+$")
+
+    def matches(self, filename):
+        match = self._pattern.match(filename)
+        if not match:
+            return False
+        try:
+            datetime.datetime.strptime(match.group("date"), "%Y%m%d")
+        except ValueError:
+            return False
+        return True
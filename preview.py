@@ -0,0 +1,111 @@
+import re
+
+# Default number of tokens of file content sent to Claude per file
+DEFAULT_PREVIEW_TOKENS = 300
+
+# Characters read from a file for each token of budget, so there is text to spare once boilerplate is dropped
+CHARS_READ_PER_TOKEN = 16
+
+MONTHS = ("january|february|march|april|may|june|july|august|september|october|november|december|"
+          "jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec")
+DATE_PATTERN = re.compile(
+    rf"\b(\d{{4}}[-/.]\d{{1,2}}[-/.]\d{{1,2}}|\d{{1,2}}[-/.]\d{{1,2}}[-/.]\d{{2,4}}|"
+    rf"(?:{MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}|\d{{1,2}}\s+(?:{MONTHS})\.?,?\s+\d{{4}})\b",
+    re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+TOC_LINE = re.compile(r"(\.\s*){4,}\d+$|^(table of )?contents$", re.IGNORECASE)
+PAGE_NUMBER = re.compile(r"^(page\s*)?#(\s*(of|/)\s*#)?$")
+NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVX]+\.|[A-Z]\.)\s+\S")
+
+def count_tokens(text):
+    """Estimate how many tokens Claude's tokenizer makes of text, without calling the API.
+
+    Short words count as one token and longer ones as one per 7 letters;
+    numbers are split into groups of three digits and every punctuation mark
+    is its own token. This tracks real counts far more closely than a flat
+    characters-per-token ratio on text that is dense in numbers and symbols.
+    """
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece.isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif piece.isalpha():
+            tokens += 1 + (len(piece) - 1) // 7
+        else:
+            tokens += 1
+    return tokens
+
+def normalize_lines(text):
+    """Split text into stripped lines with runs of whitespace collapsed and blank lines removed."""
+    text = text.replace("\u00a0", " ").replace("\r", "\n")
+    return [line for line in (" ".join(raw.split()) for raw in text.split("\n")) if line]
+
+def drop_boilerplate(lines):
+    """Remove table-of-contents entries, bare page numbers and repeated headers and footers.
+
+    Only the first two pages of a PDF are read, so a line that occurs twice or
+    more (ignoring digits, so "Page 2 of 9" matches "Page 3 of 9") is taken to
+    be a running header or footer and dropped everywhere, so it can never be
+    picked as the title.
+    """
+    keys = [re.sub(r"\d+", "#", line.casefold()) for line in lines]
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    return [line for line, key in zip(lines, keys)
+            if not (TOC_LINE.search(line) or PAGE_NUMBER.match(key) or counts[key] >= 2)]
+
+def is_heading(line):
+    """Guess whether a line is a heading: short, no closing period, and capitalized or numbered."""
+    words = line.split()
+    if len(words) > 10 or len(line) > 80 or line.endswith((".", ",", ";")):
+        return False
+    if NUMBERED_HEADING.match(line):
+        return True
+    capitalized = sum(1 for word in words if word[0].isupper() or not word[0].isalpha())
+    return line.isupper() or capitalized >= max(1, len(words) * 0.6)
+
+def truncate_to_tokens(line, budget):
+    """Return the longest prefix of line, cut at a word boundary, that fits in budget tokens."""
+    words = []
+    used = 0
+    for word in line.split(" "):
+        cost = count_tokens(word)
+        if used + cost > budget:
+            break
+        words.append(word)
+        used += cost
+    return " ".join(words)
+
+def build_preview(text, budget=DEFAULT_PREVIEW_TOKENS):
+    """Return the most informative part of text that fits in about budget tokens.
+
+    Whitespace is normalized and boilerplate dropped first. If the rest
+    still does not fit, the title (first line), lines with a date and the
+    first headings are kept before anything else, and the remaining budget is
+    filled with body text from the top of the document. Lines keep their
+    original order.
+    """
+    lines = drop_boilerplate(normalize_lines(text))
+    costs = [count_tokens(line) + 1 for line in lines]  # One more for the line break
+    if sum(costs) <= budget:
+        return "\n".join(lines)
+
+    # Pick lines in order of priority until the budget is spent
+    priority = [0]
+    priority += [i for i, line in enumerate(lines) if DATE_PATTERN.search(line)][:3]
+    priority += [i for i, line in enumerate(lines[1:], 1) if is_heading(line)][:5]
+    priority += range(len(lines))
+    chosen = {}
+    remaining = budget
+    for i in priority:
+        if i in chosen or remaining <= 0:
+            continue
+        if costs[i] <= remaining:
+            chosen[i] = lines[i]
+            remaining -= costs[i]
+        elif remaining > 8:
+            # Cut a long line rather than skip it, as long as a useful part fits
+            chosen[i] = truncate_to_tokens(lines[i], remaining - 1)
+            remaining = 0
+    return "\n".join(chosen[i] for i in sorted(chosen))
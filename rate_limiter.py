@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+
+# Status codes that mean "try again" rather than a real failure: request timeout,
+# lock conflict, rate limit and overloaded. Every other 5xx is retried too
+RETRYABLE_STATUS_CODES = (408, 409, 429, 529)
+
+class RateLimiter:
+    """Token-bucket rate limiter for Claude API calls, shared between threads.
+
+    Keeps separate budgets for requests per minute and input tokens per minute.
+    Rate-limit (429), overloaded (529) and other server errors, timeouts and
+    dropped connections are retried with exponential backoff and jitter,
+    honouring any retry-after header sent by the API.
+    """
+
+    def __init__(self, requests_per_minute=50, tokens_per_minute=40000,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+        # Statistics reported at the end of a run
+        self.wait_time = 0.0
+        self.retries = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0)
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0)
+
+    def reserve(self, tokens=0):
+        """Reserve budget for one request and return how many seconds to wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            # A single request can never need more than a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+            self._request_allowance -= 1
+            self._token_allowance -= tokens
+
+            delay = max(0.0, self._blocked_until - now)
+            if self._request_allowance < 0:
+                delay = max(delay, -self._request_allowance * 60.0 / self.requests_per_minute)
+            if self._token_allowance < 0:
+                delay = max(delay, -self._token_allowance * 60.0 / self.tokens_per_minute)
+            if delay > 0:
+                self.wait_time += delay
+            return delay
+
+    def acquire(self, tokens=0):
+        """Block until a request using the given number of tokens may be sent."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record_usage(self, usage, estimated_tokens):
+        """Correct the token budget once the real usage of a response is known.
+
+        Prompt cache reads do not count against the input token budget, so only
+        uncached input and cache writes are charged.
+        """
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        with self._lock:
+            self._token_allowance -= usage.input_tokens + cache_write - estimated_tokens
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+            self.cache_read_tokens += cache_read
+            self.cache_write_tokens += cache_write
+
+    def backoff(self, attempt, retry_after=None):
+        """Pause all callers after a rate-limit response and return the chosen delay."""
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay += random.uniform(0, delay * 0.25)  # Jitter so workers don't retry in lockstep
+
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self.retries += 1
+        return delay
+
+    def call(self, func, estimated_tokens=0):
+        """Call func under the rate limit, retrying on rate-limit, server and connection errors."""
+        import anthropic  # Already loaded by the client that func calls
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                return func()
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                self.retry_later(attempt, e)
+
+    async def call_async(self, func, estimated_tokens=0):
+        """Await func() under the rate limit without blocking the event loop, retrying like call."""
+        import asyncio
+        import anthropic
+        for attempt in range(self.max_retries + 1):
+            delay = self.reserve(estimated_tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                return await func()
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                self.retry_later(attempt, e)
+
+    def retry_later(self, attempt, error):
+        """Back off after a retryable error and report it."""
+        delay = self.backoff(attempt, get_retry_after(error))
+        reason = f"API returned {error.status_code}" if hasattr(error, "status_code") else f"API request failed ({error})"
+        print(f"{reason}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+
+def is_retryable(error):
+    """Check whether an API error is worth retrying: no status (timeout, dropped connection), a 5xx or a retryable code."""
+    status = getattr(error, "status_code", None)
+    return status is None or status >= 500 or status in RETRYABLE_STATUS_CODES
+
+def get_retry_after(error):
+    """Read the retry delay in seconds from an API error response, if the server sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date values fall back to exponential backoff
+    return None
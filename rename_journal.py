@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+JOURNAL_PREFIX = ".claude_renamer_renames-"
+
+def is_occupied(src, dst):
+    """Check whether dst is taken by a file other than src (a case-only rename keeps the same file)."""
+    if not os.path.lexists(dst):
+        return False
+    try:
+        return not os.path.samefile(src, dst)
+    except OSError:
+        return True
+
+def default_journal_path(directory_path):
+    """Return a new journal path in directory_path, named after the current time."""
+    base = os.path.join(directory_path, f"{JOURNAL_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}")
+    path = f"{base}.jsonl"
+    count = 0
+    while os.path.exists(path):
+        count += 1
+        path = f"{base}_{count}.jsonl"
+    return path
+
+class RenameJournal:
+    """Write-ahead log of the renames applied in one run, so they can be rolled back or undone.
+
+    Every move is appended to the journal and fsynced before it is made, a
+    batch of up to batch_size moves at a time, so after a crash the journal
+    always covers every file that may have moved. apply checks a whole set of
+    renames before touching anything: missing sources, duplicate targets and
+    targets that would overwrite a file are rejected. Renames that depend on
+    each other, such as chains (A->B, B->C) and swaps (A->B, B->A), are applied
+    in two phases: the files whose names are wanted by another rename are
+    first moved aside to temporary names, then everything is moved to its
+    final name. Each such group is atomic; if any of its moves fails, the ones
+    already made are rolled back. undo_renames reverts a whole journal.
+    The journal file is only created once the first rename is applied.
+    """
+
+    def __init__(self, path, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        self.token = uuid.uuid4().hex[:8]
+        self.moves = 0
+        self._next_id = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _write(self, records, sync=True):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def _temp_path(self, path):
+        directory, name = os.path.split(path)
+        return os.path.join(directory, f".{name}.{self.token}.renaming")
+
+    def apply(self, renames):
+        """Rename each (src, dst) pair. Returns a list with None for every success and the error otherwise."""
+        with self._lock:
+            return self._apply([(os.path.abspath(src), os.path.abspath(dst)) for src, dst in renames])
+
+    def _apply(self, renames):
+        errors = [None] * len(renames)
+
+        # Reject anything that cannot be renamed safely before moving a single file
+        valid = {}
+        targets = set()
+        for i, (src, dst) in enumerate(renames):
+            if src == dst:
+                continue
+            if not os.path.lexists(src):
+                errors[i] = FileNotFoundError(f"{src} does not exist")
+            elif dst in targets:
+                errors[i] = FileExistsError(f"{os.path.basename(dst)} is the target of another rename")
+            else:
+                valid[i] = (src, dst)
+                targets.add(dst)
+        while True:
+            # A target may only exist if it is itself being renamed out of the way
+            sources = {src for src, _ in valid.values()}
+            blocked = [i for i, (src, dst) in valid.items() if dst not in sources and is_occupied(src, dst)]
+            if not blocked:
+                break
+            for i in blocked:
+                errors[i] = FileExistsError(f"A file with the name {os.path.basename(valid[i][1])} already exists.")
+                del valid[i]
+
+        # Group renames that depend on each other; each group succeeds or fails as a whole
+        by_source = {src: i for i, (src, _) in valid.items()}
+        by_target = {dst: i for i, (_, dst) in valid.items()}
+        group_of = {}
+        groups = []
+        for i in valid:
+            if i in group_of:
+                continue
+            group = []
+            pending = [i]
+            while pending:
+                j = pending.pop()
+                if j in group_of:
+                    continue
+                group_of[j] = len(groups)
+                group.append(j)
+                src, dst = valid[j]
+                if dst in by_source:
+                    pending.append(by_source[dst])
+                if src in by_target:
+                    pending.append(by_target[src])
+            groups.append(sorted(group))
+
+        # Journal each batch of moves before making them
+        batch = []
+        for group in groups:
+            batch.append((group, self._plan(group, valid)))
+            if sum(len(moves) for _, moves in batch) >= self.batch_size:
+                self._run_batch(batch, errors)
+                batch = []
+        if batch:
+            self._run_batch(batch, errors)
+        return errors
+
+    def _plan(self, group, valid):
+        """Return the moves for one group: files wanted by another rename go to a temporary name first."""
+        targets = {valid[i][1] for i in group}
+        aside = {}
+        moves = []
+        for i in group:
+            src, dst = valid[i]
+            if src in targets:
+                aside[i] = self._temp_path(src)
+                moves.append((src, aside[i], True))
+        for i in group:
+            src, dst = valid[i]
+            moves.append((aside.get(i, src), dst, False))
+        return moves
+
+    def _run_batch(self, batch, errors):
+        records = []
+        numbered = []
+        for group, moves in batch:
+            ids = []
+            for src, dst, aside in moves:
+                # Ids carry the journal's token so two runs appending to one file never clash
+                move_id = f"{self.token}:{self._next_id}"
+                records.append({"op": "move", "id": move_id, "src": src, "dst": dst, "aside": aside,
+                                "time": time.time()})
+                ids.append(move_id)
+                self._next_id += 1
+            numbered.append((group, [(move_id, (src, dst)) for move_id, (src, dst, _) in zip(ids, moves)]))
+        self._write(records)
+
+        done = []
+        for group, moves in numbered:
+            completed = []
+            try:
+                for move_id, (src, dst) in moves:
+                    if is_occupied(src, dst):
+                        raise FileExistsError(f"A file with the name {os.path.basename(dst)} already exists.")
+                    os.rename(src, dst)
+                    completed.append((move_id, src, dst))
+            except OSError as e:
+                for i in group:
+                    errors[i] = e
+                # Moves that never happened are closed too, so undo does not mistake them for conflicts
+                attempted = {move_id for move_id, _, _ in completed}
+                done.extend({"op": "undone", "id": move_id} for move_id, _ in moves if move_id not in attempted)
+                done.extend(self._rollback(completed))
+            else:
+                self.moves += len(group)
+                done.extend({"op": "done", "id": move_id} for move_id, _, _ in completed)
+        # Completion records are only a convenience, so they ride on the next batch's fsync
+        self._write(done, sync=False)
+
+    def _rollback(self, completed):
+        records = []
+        for move_id, src, dst in reversed(completed):
+            try:
+                os.rename(dst, src)
+                records.append({"op": "undone", "id": move_id})
+            except OSError as e:
+                print(f"Could not roll back {os.path.basename(dst)} to {os.path.basename(src)}: {str(e)}")
+        return records
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def undo_renames(path, batch_size=256):
+    """Revert every rename recorded in a journal, newest first. Returns the number of files (reverted, failed).
+
+    A move is reverted when its target still exists and its source name is
+    free. Moves that never happened or were already undone are skipped, so an
+    undo that was interrupted can simply be run again.
+    """
+    moves = []
+    undone = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if record["op"] == "move":
+                moves.append(record)
+            elif record["op"] == "undone":
+                undone.add(record["id"])
+
+    reverted = 0
+    failed = 0
+    records = []
+    with open(path, "a", encoding="utf-8") as journal:
+        for move in reversed(moves):
+            if move["id"] in undone:
+                continue
+            src, dst = move["src"], move["dst"]
+            if not os.path.lexists(dst):
+                continue  # Never happened, or already reverted
+            if os.path.lexists(src):
+                print(f"Cannot undo {os.path.basename(dst)}: {src} already exists")
+                failed += 1
+                continue
+            try:
+                os.rename(dst, src)
+            except OSError as e:
+                print(f"Cannot undo {os.path.basename(dst)}: {str(e)}")
+                failed += 1
+                continue
+            records.append({"op": "undone", "id": move["id"]})
+            if not move.get("aside"):
+                reverted += 1
+            if len(records) >= batch_size:
+                journal.write("".join(json.dumps(record) + "\n" for record in records))
+                journal.flush()
+                os.fsync(journal.fileno())
+                records = []
+        journal.write("".join(json.dumps(record) + "\n" for record in records))
+    return reverted, failed
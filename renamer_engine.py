@@ -0,0 +1,1441 @@
+import os
+import json
+import datetime
+import functools
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from extractors import extract_docx_text, extract_pdf_text
+from file_scanner import scan_files
+from naming_convention import NamingConventionValidator
+from name_index import NameIndex
+from model_cascade import ModelCascade
+from preview import CHARS_READ_PER_TOKEN, DEFAULT_PREVIEW_TOKENS, build_preview, count_tokens
+from watcher import FolderWatcher
+from claude_client import create_client, DEFAULT_MAX_CONNECTIONS
+from rate_limiter import RateLimiter
+from suggestion_cache import SuggestionCache, hash_file
+
+# Claude model used for naming suggestions, and the last tier of a model cascade
+CLAUDE_MODEL = "claude-3-5-sonnet-20240620"
+
+# Bump whenever the prompt or response parsing changes so cached suggestions are invalidated
+PROMPT_VERSION = 4
+
+# Output token limit for a single-file suggestion; the JSON reply is a couple of hundred tokens
+SUGGESTION_MAX_TOKENS = 400
+
+# Shortest prompt each model family will cache; a shorter cache_control block is processed in full anyway
+PROMPT_CACHE_MIN_TOKENS = {"haiku": 2048, "sonnet": 1024, "opus": 1024}
+
+SYSTEM_PROMPT = "You are a file organization assistant that analyzes files and suggests appropriate names following specific naming conventions."
+
+# Supported file extensions
+SUPPORTED_EXTENSIONS = [
+    '.docx', '.doc',                     # Word documents
+    '.xlsx', '.xls', '.csv',             # Excel/CSV files
+    '.pdf',                              # PDF files
+    '.jpg', '.jpeg', '.png', '.gif'      # Image files
+]
+
+# Files whose content preview is only their filename
+FILENAME_ONLY_EXTENSIONS = ['.xlsx', '.xls', '.csv', '.jpg', '.jpeg', '.png', '.gif']
+
+# Files to skip
+SKIP_FILES = ['claude_renamer.py', 'claude_renamer_gui.py', 'renamer_engine.py', '.env']
+
+# Constants for naming convention - these can be customized
+DOCUMENT_FORMS = {
+    "ACT": "Action Request",
+    "AGD": "Agenda",
+    "AGR": "Agreement",
+    "ANN": "Announcement",
+    "APP": "Application/Appendix",
+    "ART": "Article",
+    "BIO": "Biography",
+    "BRC": "Brochure",
+    "BRN": "Briefing Note",
+    "CHT": "Chart",
+    "COD": "Code",
+    "COF": "Configuration File",
+    "CON": "Contract",
+    "COV": "Cover Page",
+    "DFT": "Discussion Draft",
+    "DRT": "Directory",
+    "DWG": "Drawing",
+    "ETD": "Electronic Thesis",
+    "EXA": "Example",
+    "FCT": "Fact Sheet",
+    "FRM": "Form",
+    "GRA": "Grant",
+    "GUI": "Guidelines",
+    "IMG": "Image",
+    "INT": "Interview",
+    "INV": "Invoice",
+    "INX": "Index",
+    "LCT": "Lecture",
+    "LGL": "Legal Document",
+    "LOG": "Log File",
+    "LTR": "Letter",
+    "MEM": "Memo",
+    "MIN": "Minutes",
+    "MKT": "Marketing",
+    "MNL": "Manual",
+    "MTG": "Meeting notes",
+    "NSL": "Newsletter",
+    "PLN": "Plan",
+    "PMT": "Permit",
+    "POL": "Policy",
+    "PPR": "Paper",
+    "PRC": "Procedure/Process",
+    "PRF": "Profile",
+    "PRO": "Proposal",
+    "PRS": "Presentation",
+    "PRL": "Press Release",
+    "PST": "Poster",
+    "RPT": "Report",
+    "RVW": "Review",
+    "SCH": "Schedule",
+    "SPE": "Speech",
+    "SRY": "Survey",
+    "SUM": "Summary",
+    "SUP": "Supplement",
+    "TML": "Timeline",
+    "TOR": "Terms of Reference",
+    "YRB": "Year Book",
+    "DAT": "Data",
+    "COB": "Code Book"
+}
+
+def get_file_content(file_path, max_chars=4000):
+    """Extract up to max_chars characters of text content from files based on their type."""
+    try:
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        # Word documents
+        if file_extension in ['.docx', '.doc']:
+            try:
+                return extract_docx_text(file_path, max_chars)
+            except:
+                return f"Word document: {os.path.basename(file_path)}"
+        
+        # PDF files
+        elif file_extension == '.pdf':
+            try:
+                # From at most the first 2 pages
+                return extract_pdf_text(file_path, max_chars, max_pages=2)
+            except:
+                return f"PDF document: {os.path.basename(file_path)}"
+        
+        # Excel/CSV files - just return filename for analysis
+        elif file_extension in ['.xlsx', '.xls', '.csv']:
+            return f"Spreadsheet: {os.path.basename(file_path)}"
+            
+        # Images - just return filename for analysis
+        elif file_extension in ['.jpg', '.jpeg', '.png', '.gif']:
+            return f"Image: {os.path.basename(file_path)}"
+            
+        # Other files - just return filename
+        else:
+            return f"File: {os.path.basename(file_path)}"
+            
+    except Exception as e:
+        return f"Error reading file {os.path.basename(file_path)}: {str(e)}"
+
+def extract_date_from_filename(filename):
+    """Extract date from filename if present."""
+    # Look for common date patterns
+    # Format: Month DD, YYYY
+    month_names = ["January", "February", "March", "April", "May", "June", "July", 
+                  "August", "September", "October", "November", "December"]
+    
+    # Try to find dates like "August 28, 2024" or "August+28,+2024"
+    for month in month_names:
+        pattern = fr'{month}\s*[\+_]?\s*(\d{{1,2}})[,\s\+_]+(\d{{4}})'
+        match = re.search(pattern, filename, re.IGNORECASE)
+        if match:
+            day = match.group(1)
+            year = match.group(2)
+            month_num = month_names.index(month) + 1
+            return f"{year}{month_num:02d}{int(day):02d}"
+    
+    # Look for YYYY-MM-DD or YYYY/MM/DD
+    date_pattern = r'(\d{4})[-/\s](\d{1,2})[-/\s](\d{1,2})'
+    match = re.search(date_pattern, filename)
+    if match:
+        year, month, day = match.groups()
+        return f"{year}{int(month):02d}{int(day):02d}"
+    
+    # Default to current date if no date found
+    today = datetime.datetime.now()
+    return today.strftime("%Y%m%d")
+
+def extract_keywords_from_filename(filename):
+    """Extract meaningful keywords from filename."""
+    # Remove file extension
+    name_without_ext = os.path.splitext(filename)[0]
+    
+    # Replace common separators with spaces
+    name_clean = re.sub(r'[_\+\-\.]', ' ', name_without_ext)
+    
+    # Split into words
+    words = name_clean.split()
+    
+    # Filter out common stop words and numbers
+    stop_words = ['the', 'and', 'or', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'with', 'by']
+    keywords = [word for word in words if word.lower() not in stop_words and not word.isdigit()]
+    
+    return keywords
+
+def smart_fallback_naming(file_info):
+    """Create intelligent fallback naming based on filename analysis."""
+    src_path = file_info["src_path"]
+    filename = os.path.basename(src_path)
+    extension = os.path.splitext(filename)[1].lower()
+    
+    # Extract useful information from filename
+    keywords = extract_keywords_from_filename(filename)
+    date_str = extract_date_from_filename(filename)
+    
+    # Determine subject, description, and doc type based on keywords and extension
+    if len(keywords) >= 2:
+        subject = keywords[0]
+        description = ''.join(word.capitalize() for word in keywords[1:min(4, len(keywords))])
+    else:
+        subject = keywords[0] if keywords else "Misc"
+        description = "Document"
+    
+    # Select document form based on content/extension
+    if extension in ['.xlsx', '.xls', '.csv']:
+        if any('application' in kw.lower() for kw in keywords):
+            doc_type = "APP"  # Application
+        elif any('data' in kw.lower() for kw in keywords):
+            doc_type = "DAT"  # Data
+        else:
+            doc_type = "DAT"  # Default for spreadsheets
+    elif extension in ['.docx', '.doc']:
+        if any(kw.lower() in ['report', 'reporting'] for kw in keywords):
+            doc_type = "RPT"  # Report
+        elif any(kw.lower() in ['memo', 'memorandum'] for kw in keywords):
+            doc_type = "MEM"  # Memo
+        elif any(kw.lower() in ['form'] for kw in keywords):
+            doc_type = "FRM"  # Form
+        else:
+            doc_type = "DOC"  # Default for Word docs
+    elif extension in ['.pdf']:
+        if any(kw.lower() in ['report'] for kw in keywords):
+            doc_type = "RPT"  # Report
+        else:
+            doc_type = "DOC"  # Default for PDFs
+    elif extension in ['.jpg', '.jpeg', '.png', '.gif']:
+        doc_type = "IMG"  # Image
+    else:
+        doc_type = "MIS"  # Miscellaneous
+    
+    # Create filename following the convention
+    new_name = f"{subject}_{description}_{doc_type}_{date_str}_Rev0{extension}"
+    
+    return {
+        "src_path": src_path,
+        "new_name": new_name,
+        "reason": f"Smart fallback: Used {subject} as subject, {description} as description, {doc_type} as document type, and extracted date {date_str}."
+    }
+
+def skip_reason(relative_path, file_size, file_mtime, validator=None, manifest=None):
+    """Return why a scanned file should not be analyzed, or None if it should be."""
+    filename = os.path.basename(relative_path)
+    
+    # Skip files that don't match our supported extensions
+    if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+        return "Skipping unsupported file type"
+    
+    # Skip certain files
+    if filename in SKIP_FILES or filename.startswith('.'):
+        return "Skipping file"
+    
+    # Skip files a previous run already renamed, unless they changed since
+    if manifest is not None and relative_path in manifest:
+        if manifest.is_unchanged(relative_path, file_size, file_mtime):
+            return "Skipping unchanged file"
+    elif validator and validator.matches(filename):
+        return "Skipping already renamed file"
+    return None
+
+def extract_summary(file_path, relative_path, extension, file_size, file_mtime, preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Build the summary for one file. Runs in an extraction worker process.
+
+    The content kept is a preview of at most preview_tokens tokens, built
+    from the most informative lines of the file by build_preview.
+    """
+    print(f"Processing file: {relative_path}")
+    
+    # Get basic file info
+    try:
+        start = time.perf_counter()
+        file_content = get_file_content(file_path, preview_tokens * CHARS_READ_PER_TOKEN)
+        
+        return {
+            "path": relative_path,
+            "src_path": relative_path,
+            "full_path": file_path,
+            "filename": os.path.basename(file_path),
+            "extension": extension,
+            "size": file_size,
+            "modified": datetime.datetime.fromtimestamp(file_mtime).isoformat(),
+            "mtime": file_mtime,
+            "content": build_preview(file_content, preview_tokens) if isinstance(file_content, str) else "",
+            # Timed here because extraction may run in another process
+            "extract_seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        print(f"Error processing {file_path}: {str(e)}")
+        return None
+
+def iter_candidates(directory_path, *, recursive=False, include=None, exclude=None, max_depth=None, force=False,
+                    manifest=None, metrics=None):
+    """Yield (file_path, relative_path, extension, size, mtime) for every file that needs analysis.
+
+    recursive, include, exclude and max_depth are passed to scan_files. Files
+    already named by the convention, or unchanged since the manifest recorded
+    them, are skipped unless force is set.
+    """
+    validator = None if force else NamingConventionValidator(DOCUMENT_FORMS)
+    start = time.perf_counter()
+    for file_path, relative_path, file_size, file_mtime in scan_files(directory_path, recursive, include, exclude, max_depth):
+        reason = skip_reason(relative_path, file_size, file_mtime, validator, None if force else manifest)
+        if reason:
+            print(f"{reason}: {relative_path}")
+            if metrics is not None:
+                metrics.count("skipped")
+            continue
+        
+        extension = os.path.splitext(file_path)[1].lower()
+        if metrics is not None:
+            metrics.add("scan", time.perf_counter() - start)
+        yield file_path, relative_path, extension, file_size, file_mtime
+        start = time.perf_counter()
+
+def record_extract(summary, metrics=None):
+    """Move the extraction time out of a summary and into metrics."""
+    seconds = summary.pop("extract_seconds", None)
+    if metrics is not None and seconds is not None:
+        metrics.add("extract", seconds)
+    return summary
+
+def iter_directory_summaries(directory_path, extract_workers=None, *, recursive=False, include=None, exclude=None,
+                             max_depth=None, force=False, manifest=None, metrics=None,
+                             preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Yield summaries of all files in a directory as their content is extracted.
+
+    Text extraction runs in a pool of extract_workers processes (default: one
+    per CPU) so CPU-bound PDF parsing does not hold the analysis thread's GIL.
+    Summaries are yielded in directory order, and only a small window of files
+    is extracted ahead of the consumer, so memory stays flat on large shares.
+    The remaining arguments select files as in iter_candidates.
+    """
+    candidates = iter_candidates(directory_path, recursive=recursive, include=include, exclude=exclude, max_depth=max_depth,
+                                 force=force, manifest=manifest, metrics=metrics)
+    
+    extract_workers = extract_workers or os.cpu_count() or 1
+    if extract_workers <= 1:
+        for candidate in candidates:
+            summary = extract_summary(*candidate, preview_tokens)
+            if summary is not None:
+                yield record_extract(summary, metrics)
+        return
+    
+    # Keep a bounded window of extractions in flight and yield them in order
+    from concurrent.futures import ProcessPoolExecutor  # Loads multiprocessing, so only when needed
+    with ProcessPoolExecutor(max_workers=extract_workers) as executor:
+        window = deque()
+        for candidate in candidates:
+            window.append(executor.submit(extract_summary, *candidate, preview_tokens))
+            if len(window) >= extract_workers * 4:
+                break
+        while window:
+            summary = window.popleft().result()
+            next_candidate = next(candidates, None)
+            if next_candidate is not None:
+                window.append(executor.submit(extract_summary, *next_candidate, preview_tokens))
+            if summary is not None:
+                yield record_extract(summary, metrics)
+
+def get_directory_summaries(directory_path, extract_workers=None, *, recursive=False, include=None, exclude=None,
+                            max_depth=None, force=False, manifest=None, metrics=None,
+                            preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Get summaries of all files in a directory."""
+    return list(iter_directory_summaries(directory_path, extract_workers, recursive=recursive, include=include,
+                                         exclude=exclude, max_depth=max_depth, force=force, manifest=manifest,
+                                         metrics=metrics, preview_tokens=preview_tokens))
+
+def naming_instructions(doc_forms):
+    """Return the description of the naming convention shared by every prompt."""
+    return f"""Key elements in a filename include:
+- Subject or Activity (required)
+- Description of what the document is (required)
+- Document Form (optional): Use form codes like MEM (Memo), RPT (Report), MKT (Marketing), etc.
+- Date in YYYYMMDD format (required)
+- Revision (required): Use 'Rev0' for first final version, letters A,B,C for drafts
+
+The filename format should be: Subject_Description_DocumentForm_YYYYMMDD_Rev#.extension
+
+For example: Project_RiskManagement_GUI_20150414_Rev0.pdf
+
+Available Document Form codes include:
+{doc_forms}"""
+
+def single_file_instructions(doc_forms):
+    """Return the static part of the single-file prompt, identical for every file."""
+    return f"""I need help following a standardized file naming convention for a file.
+
+{naming_instructions(doc_forms)}
+
+The user message contains information about the file. Please analyze this file and provide ONLY a JSON response with the following format:
+```json
+{{
+  "subject": "Brief subject/category",
+  "description": "CamelCaseDescriptionOfDocument",
+  "document_form": "XXX",
+  "date": "YYYYMMDD",
+  "revision": "Rev0",
+  "reasoning": "Brief explanation of why you chose these elements",
+  "confidence": 0.9
+}}
+```
+
+The date should be extracted from the file content or filename if available, otherwise use today's date.
+Choose the most appropriate document form code from the list based on content.
+Keep the subject and description concise but descriptive.
+Set confidence between 0 and 1 to how sure you are that the name fits the file; use a low value when the content is ambiguous."""
+
+def content_preview(file_info):
+    """Return the part of a file's content that is sent to Claude (already cut to the preview budget)."""
+    return file_info['content'] if len(file_info['content']) > 0 else "No content available"
+
+def estimate_tokens(text):
+    return count_tokens(text)
+
+@functools.lru_cache(maxsize=32)
+def can_cache_prompt(text, model):
+    """Return True if text is at least the minimum prompt length the model caches."""
+    family = next((name for name in PROMPT_CACHE_MIN_TOKENS if name in model), "haiku")
+    return count_tokens(text) >= PROMPT_CACHE_MIN_TOKENS[family]
+
+def message_params(instructions, prompt, max_tokens, model=CLAUDE_MODEL):
+    """Return the Messages API parameters for a prompt, shared by direct and batch requests.
+
+    The static instructions go in the system prompt. It is marked for prompt
+    caching only when it is long enough for the model to cache it, so with the
+    default form list (well under every minimum) nothing is marked.
+    """
+    system = {"type": "text", "text": f"{SYSTEM_PROMPT}\n\n{instructions}"}
+    if can_cache_prompt(system["text"], model):
+        system["cache_control"] = {"type": "ephemeral"}
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": 0.0,
+        "system": [system],
+        "messages": [
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+    }
+
+def send_prompt(client, instructions, prompt, max_tokens, *, rate_limiter=None, metrics=None, model=CLAUDE_MODEL):
+    """Send a prompt to Claude, going through the rate limiter when one is given.
+
+    With metrics, every attempt is recorded as an api span, so retried
+    requests show up as extra calls.
+    """
+    def send():
+        if metrics is None:
+            return client.messages.create(**message_params(instructions, prompt, max_tokens, model))
+        with metrics.span("api"):
+            return client.messages.create(**message_params(instructions, prompt, max_tokens, model))
+    
+    if not rate_limiter:
+        return send()
+    estimated_tokens = estimate_tokens(instructions) + estimate_tokens(prompt)
+    message = rate_limiter.call(send, estimated_tokens)
+    rate_limiter.record_usage(message.usage, estimated_tokens)
+    return message
+
+async def send_prompt_async(client, instructions, prompt, max_tokens, *, rate_limiter=None, metrics=None,
+                            model=CLAUDE_MODEL):
+    """Send a prompt with an AsyncAnthropic client, going through the rate limiter when one is given."""
+    async def send():
+        if metrics is None:
+            return await client.messages.create(**message_params(instructions, prompt, max_tokens, model))
+        with metrics.span("api"):
+            return await client.messages.create(**message_params(instructions, prompt, max_tokens, model))
+    
+    if not rate_limiter:
+        return await send()
+    estimated_tokens = estimate_tokens(instructions) + estimate_tokens(prompt)
+    message = await rate_limiter.call_async(send, estimated_tokens)
+    rate_limiter.record_usage(message.usage, estimated_tokens)
+    return message
+
+def suggestion_to_result(suggestion, file_info):
+    """Turn Claude's parsed JSON suggestion into a rename entry for file_info."""
+    # Create filename following the convention
+    new_name = f"{suggestion['subject']}_{suggestion['description']}_{suggestion['document_form']}_{suggestion['date']}_{suggestion['revision']}{file_info['extension']}"
+    
+    return {
+        "src_path": file_info["src_path"],
+        "new_name": new_name,
+        "reason": suggestion['reasoning'],
+        "claude_used": True,
+        "document_form": suggestion['document_form'],
+        "confidence": parse_confidence(suggestion.get('confidence')),
+    }
+
+def parse_confidence(value):
+    """Return Claude's confidence as a float between 0 and 1, or None if it is missing or not a number."""
+    try:
+        return min(1.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+def build_naming_prompt(file_info):
+    """Create the per-file part of the naming prompt for Claude."""
+    return f"""Here is information about the file:
+Filename: {file_info['filename']}
+File Type: {file_info['extension']}
+Content Preview: {content_preview(file_info)}
+"""
+
+def parse_naming_response(response_text, file_info):
+    """Parse Claude's reply to a single-file prompt, falling back to smart naming if it has no JSON."""
+    # Extract JSON from response
+    json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+    if not json_match:
+        # Try without the code block markers
+        json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
+        
+    if json_match:
+        json_text = json_match.group(1)
+        suggestion = json.loads(json_text)
+        return suggestion_to_result(suggestion, file_info)
+    else:
+        print(f"Could not parse JSON from Claude's response for {file_info['filename']}")
+        print(f"Claude's response: {response_text[:200]}...")
+        return smart_fallback_naming(file_info)
+
+def timed(metrics, stage, func, *args):
+    """Call func(*args), recording it as a span of stage when metrics are given."""
+    if metrics is None:
+        return func(*args)
+    with metrics.span(stage):
+        return func(*args)
+
+def cascade_models(cascade):
+    return cascade.models if cascade is not None else [CLAUDE_MODEL]
+
+def accept_suggestion(result, file_info, tier, cascade=None, metrics=None):
+    """Check whether the result from tier of the cascade is kept; otherwise it is escalated to the next model."""
+    model = cascade_models(cascade)[tier]
+    if result.get("claude_used"):
+        result["model"] = model
+    if cascade is None:
+        return True
+    if cascade.should_escalate(tier, result, file_info["extension"] in FILENAME_ONLY_EXTENSIONS):
+        print(f"Escalating {file_info['filename']} from {model} (confidence {result.get('confidence')})")
+        cascade.record(model, escalated=True)
+        count_event(metrics, "escalated")
+        return False
+    if result.get("claude_used"):
+        cascade.record(model)
+    return True
+
+def create_claude_naming_suggestion(file_info, client, doc_forms, *, rate_limiter=None, metrics=None, cascade=None,
+                                    first_tier=0):
+    """Use Claude to generate naming suggestion for a file.
+
+    With a ModelCascade the file goes to its models in turn, starting at
+    first_tier, until one gives an answer that does not need escalating.
+    """
+    models = cascade_models(cascade)
+    # Call Claude API with the cached instructions and a tailored prompt
+    instructions, prompt = timed(metrics, "prompt", lambda: (single_file_instructions(doc_forms), build_naming_prompt(file_info)))
+    for tier in range(min(first_tier, len(models) - 1), len(models)):
+        try:
+            message = send_prompt(client, instructions, prompt, SUGGESTION_MAX_TOKENS, rate_limiter=rate_limiter,
+                                  metrics=metrics, model=models[tier])
+
+            # Parse Claude's response
+            result = timed(metrics, "parse", parse_naming_response, message.content[0].text, file_info)
+                
+        except Exception as e:
+            print(f"Error with Claude API for {file_info['filename']}: {str(e)}")
+            result = smart_fallback_naming(file_info)
+        if accept_suggestion(result, file_info, tier, cascade, metrics):
+            break
+    return result
+
+async def create_claude_naming_suggestion_async(file_info, client, doc_forms, *, rate_limiter=None, metrics=None,
+                                                cascade=None, first_tier=0):
+    """Asyncio version of create_claude_naming_suggestion for an AsyncAnthropic client."""
+    models = cascade_models(cascade)
+    instructions, prompt = timed(metrics, "prompt", lambda: (single_file_instructions(doc_forms), build_naming_prompt(file_info)))
+    for tier in range(min(first_tier, len(models) - 1), len(models)):
+        try:
+            message = await send_prompt_async(client, instructions, prompt, SUGGESTION_MAX_TOKENS,
+                                              rate_limiter=rate_limiter, metrics=metrics, model=models[tier])
+            result = timed(metrics, "parse", parse_naming_response, message.content[0].text, file_info)
+        except Exception as e:
+            print(f"Error with Claude API for {file_info['filename']}: {str(e)}")
+            result = smart_fallback_naming(file_info)
+        if accept_suggestion(result, file_info, tier, cascade, metrics):
+            break
+    return result
+
+# Fields every suggestion in a batch response must contain
+SUGGESTION_FIELDS = ("subject", "description", "document_form", "date", "revision", "reasoning")
+
+def is_valid_suggestion(item):
+    """Check that a batch response entry has every field as a non-empty string."""
+    return isinstance(item, dict) and all(
+        isinstance(item.get(field), str) and item[field].strip() for field in SUGGESTION_FIELDS)
+
+def create_claude_batch_suggestions(batch, client, doc_forms, *, rate_limiter=None, metrics=None, cascade=None):
+    """Use Claude to generate naming suggestions for several files in one request.
+
+    batch is a list of file_info dicts. Returns a dict mapping the position in
+    batch to a rename entry; files whose entry is missing or malformed are left
+    out so the caller can retry them one at a time. With a ModelCascade the
+    request goes to its first model, and files whose answer needs escalating
+    map to None, so the caller can retry them from the second model.
+    """
+    prompt_start = time.perf_counter()
+    file_blocks = "\n\n".join(
+        f"""File id: {file_id}
+Filename: {file_info['filename']}
+File Type: {file_info['extension']}
+Content Preview: {content_preview(file_info)}"""
+        for file_id, file_info in enumerate(batch))
+
+    instructions = f"""I need help following a standardized file naming convention for several files.
+
+{naming_instructions(doc_forms)}
+
+The user message contains information about the files, each with a file id. Please analyze each file and provide ONLY a JSON array with one object per file in the following format:
+```json
+[
+  {{
+    "id": 0,
+    "subject": "Brief subject/category",
+    "description": "CamelCaseDescriptionOfDocument",
+    "document_form": "XXX",
+    "date": "YYYYMMDD",
+    "revision": "Rev0",
+    "reasoning": "Brief explanation of why you chose these elements",
+    "confidence": 0.9
+  }}
+]
+```
+
+Use the file id given for each object and analyze each file independently.
+The date should be extracted from the file content or filename if available, otherwise use today's date.
+Choose the most appropriate document form code from the list based on content.
+Keep the subject and description concise but descriptive.
+Set confidence between 0 and 1 to how sure you are that each name fits its file; use a low value when the content is ambiguous."""
+
+    prompt = f"""Here is information about the files:
+
+{file_blocks}
+"""
+    if metrics is not None:
+        metrics.add("prompt", time.perf_counter() - prompt_start)
+
+    try:
+        message = send_prompt(client, instructions, prompt, min(4096, 300 * len(batch)), rate_limiter=rate_limiter,
+                              metrics=metrics, model=cascade_models(cascade)[0])
+        parse_start = time.perf_counter()
+        response_text = message.content[0].text
+        
+        # Extract JSON from response
+        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        if not json_match:
+            json_match = re.search(r'(\[.*\])', response_text, re.DOTALL)
+        items = json.loads(json_match.group(1)) if json_match else None
+        if metrics is not None:
+            metrics.add("parse", time.perf_counter() - parse_start)
+    except Exception as e:
+        print(f"Error with Claude API for batch of {len(batch)} files: {str(e)}")
+        return {}
+    
+    if not isinstance(items, list):
+        print(f"Could not parse JSON array from Claude's response for batch of {len(batch)} files")
+        return {}
+    
+    results = {}
+    for item in items:
+        file_id = item.get("id") if isinstance(item, dict) else None
+        if isinstance(file_id, int) and 0 <= file_id < len(batch) and file_id not in results and is_valid_suggestion(item):
+            result = suggestion_to_result(item, batch[file_id])
+            results[file_id] = result if accept_suggestion(result, batch[file_id], 0, cascade, metrics) else None
+    return results
+
+def make_batches(summaries, batch_tokens=0, batch_size=10):
+    """Group summaries into batches of (index, file_info) that fit in the given prompt token budget.
+
+    With batch_tokens of 0 every file gets its own request. summaries may be
+    any iterable; batches are yielded as soon as they are full.
+    """
+    batching = batch_tokens > 0 and batch_size > 1
+    current = []
+    current_tokens = 0
+    for i, file_info in enumerate(summaries):
+        if not batching:
+            yield [(i, file_info)]
+            continue
+        tokens = estimate_tokens(content_preview(file_info)) + estimate_tokens(file_info['filename']) + 20
+        if current and (current_tokens + tokens > batch_tokens or len(current) >= batch_size):
+            yield current
+            current = []
+            current_tokens = 0
+        current.append((i, file_info))
+        current_tokens += tokens
+    if current:
+        yield current
+
+def analyze_file(file_info, client, doc_forms_str, *, rate_limiter=None, metrics=None, cascade=None, first_tier=0):
+    """Get a naming suggestion for a single file, falling back to smart naming on error."""
+    try:
+        return create_claude_naming_suggestion(file_info, client, doc_forms_str, rate_limiter=rate_limiter, metrics=metrics,
+                                               cascade=cascade, first_tier=first_tier)
+    except Exception as e:
+        print(f"Error processing {file_info['filename']}: {str(e)}")
+        return smart_fallback_naming(file_info)
+
+def resolve_name_collision(suggestion, file_info, index=None):
+    """Add a unique identifier to the suggested name if it would collide with another file.
+
+    index is the run's NameIndex of existing and already reserved names. The
+    chosen name is reserved in it, so two files never get the same new name
+    and no file is overwritten. Without an index the file's directory is
+    listed just for this call.
+    """
+    if index is None:
+        index = NameIndex()
+    src_full_path = os.path.normpath(file_info.get("full_path") or os.path.join(os.getcwd(), file_info["src_path"]))
+    file_dir, current_name = os.path.split(src_full_path)
+    new_name_base, extension = os.path.splitext(suggestion["new_name"])
+    
+    # Check for file name collisions
+    new_name = index.reserve(file_dir, new_name_base, extension, current_name)
+    
+    # Update the new name with unique identifier if needed
+    if new_name != suggestion["new_name"]:
+        unique_id = os.path.splitext(new_name)[0][len(new_name_base):]
+        suggestion["new_name"] = new_name
+        suggestion["reason"] += f" (Unique identifier {unique_id} added to prevent naming collision)"
+    
+    return suggestion
+
+def get_cached_suggestion(file_info, cache, *, refresh=False, cascade=None, preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Look up a file in the suggestion cache.
+
+    Returns (key, suggestion); suggestion is None on a miss or when refresh is set.
+    Suggestions are cached per model (or model cascade) and per preview budget,
+    since a different budget sends Claude a different preview.
+    """
+    try:
+        model = cascade.key if cascade is not None else CLAUDE_MODEL
+        key = SuggestionCache.make_key(hash_file(file_info["full_path"]), f"{PROMPT_VERSION}:{preview_tokens}", model)
+    except OSError as e:
+        print(f"Could not hash {file_info['filename']} for the cache: {str(e)}")
+        return None, None
+    
+    if refresh:
+        return key, None
+    cached = cache.get(key)
+    if cached is None:
+        return key, None
+    return key, {"src_path": file_info["src_path"], **cached}
+
+def cache_suggestion(cache, key, suggestion):
+    """Store a suggestion in the cache; only real Claude suggestions are kept, never fallback names."""
+    if cache is not None and key is not None and suggestion.get("claude_used"):
+        cache.put(key, {"new_name": suggestion["new_name"], "reason": suggestion["reason"], "claude_used": True})
+
+def count_event(metrics, event):
+    if metrics is not None:
+        metrics.count(event)
+
+def get_checkpointed_suggestion(file_info, checkpoint):
+    """Return the suggestion an interrupted run journaled for file_info, or None."""
+    if checkpoint is None:
+        return None
+    return checkpoint.get(file_info["src_path"], file_info["size"], file_info["mtime"])
+
+def checkpoint_suggestion(checkpoint, file_info, suggestion):
+    """Append a completed suggestion to the checkpoint journal."""
+    if checkpoint is not None:
+        checkpoint.record(file_info["src_path"], file_info["size"], file_info["mtime"], suggestion)
+
+def create_file_tree(summaries, api_key, workers=1, *, rate_limiter=None, client=None, cache=None, refresh=False,
+                     batch_tokens=0, batch_size=10, checkpoint=None, controller=None, metrics=None, cascade=None,
+                     preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Process each file with Claude on up to workers threads and get back organized structure.
+
+    summaries may be a generator, so analysis starts while later files are
+    still being extracted. Suggestions come back in the order of summaries,
+    with collisions resolved in that order. With batch_tokens > 0, up to
+    batch_size files share one request. After a cancel through controller,
+    the files analyzed so far are returned.
+    """
+    # Use Claude to generate naming suggestions
+    doc_forms_str = ', '.join([f"{k} ({v})" for k, v in DOCUMENT_FORMS.items()])
+    total = len(summaries) if hasattr(summaries, "__len__") else None
+    workers = max(1, workers)
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    if client is None:
+        client = create_client(api_key, max_connections=max(workers, DEFAULT_MAX_CONNECTIONS))
+    
+    # Summaries without their content, kept for collision resolution
+    file_infos = []
+    suggestions = []
+    
+    def progress(i):
+        return f"{i+1}/{total}" if total else f"{i+1}"
+    
+    def analyze(batch):
+        results = {}
+        pending = []
+        for i, file_info in batch:
+            resumed = get_checkpointed_suggestion(file_info, checkpoint)
+            if resumed is not None:
+                print(f"Resuming with checkpointed suggestion for file {progress(i)}: {file_info['filename']}")
+                count_event(metrics, "resumed")
+                results[i] = resumed
+                continue
+            key = None
+            if cache is not None:
+                key, cached = get_cached_suggestion(file_info, cache, refresh=refresh, cascade=cascade,
+                                                    preview_tokens=preview_tokens)
+                if cached is not None:
+                    print(f"Using cached suggestion for file {progress(i)}: {file_info['filename']}")
+                    count_event(metrics, "cache_hits")
+                    results[i] = cached
+                    continue
+            pending.append((i, file_info, key))
+        
+        batch_results = {}
+        if controller is not None and not controller.wait():
+            return results
+        if len(pending) > 1:
+            print(f"Analyzing files {', '.join(progress(i) for i, _, _ in pending)} in one request")
+            batch_results = create_claude_batch_suggestions(
+                [file_info for _, file_info, _ in pending], client, doc_forms_str, rate_limiter=rate_limiter,
+                metrics=metrics, cascade=cascade)
+        
+        for position, (i, file_info, key) in enumerate(pending):
+            suggestion = batch_results.get(position)
+            if suggestion is None and controller is not None and not controller.wait():
+                break
+            if suggestion is None:
+                print(f"Analyzing file {progress(i)}: {file_info['filename']}")
+                # Files the batch's model was unsure of start at the next model
+                first_tier = 1 if position in batch_results else 0
+                suggestion = analyze_file(file_info, client, doc_forms_str, rate_limiter=rate_limiter, metrics=metrics,
+                                          cascade=cascade, first_tier=first_tier)
+            count_event(metrics, "analyzed")
+            
+            cache_suggestion(cache, key, suggestion)
+            checkpoint_suggestion(checkpoint, file_info, suggestion)
+            results[i] = suggestion
+        return results
+    
+    def track(batch):
+        for _, file_info in batch:
+            file_infos.append({k: v for k, v in file_info.items() if k != "content"})
+            suggestions.append(None)
+    
+    def collect(future):
+        try:
+            for i, suggestion in future.result().items():
+                suggestions[i] = suggestion
+        except Exception as e:
+            print(f"Error processing batch: {str(e)}")
+    
+    batches = make_batches(summaries, batch_tokens, batch_size)
+    if workers == 1:
+        for batch in batches:
+            if controller is not None and controller.cancelled:
+                break
+            track(batch)
+            for i, suggestion in analyze(batch).items():
+                suggestions[i] = suggestion
+    else:
+        print(f"Analyzing files with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Only read ahead a couple of batches per worker so extraction is not outrun
+            in_flight = set()
+            for batch in batches:
+                if controller is not None and controller.cancelled:
+                    break
+                track(batch)
+                in_flight.add(executor.submit(analyze, batch))
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+            for future in as_completed(in_flight):
+                collect(future)
+    
+    # If no files, return empty list
+    if not file_infos:
+        print("No files to organize.")
+        return []
+    
+    # Files a cancel stopped before they were analyzed are left out
+    if controller is not None and controller.cancelled:
+        analyzed = [i for i, suggestion in enumerate(suggestions) if suggestion is not None]
+        print(f"Analysis cancelled after {len(analyzed)} of {len(suggestions)} files")
+        file_infos = [file_infos[i] for i in analyzed]
+        suggestions = [suggestions[i] for i in analyzed]
+    
+    # Anything a failed worker left behind gets smart fallback naming
+    for i, suggestion in enumerate(suggestions):
+        if suggestion is None:
+            suggestions[i] = smart_fallback_naming(file_infos[i])
+        if not suggestions[i].get("claude_used"):
+            count_event(metrics, "fallbacks")
+    
+    # Resolve collisions in the original order so suffixes are deterministic
+    files = []
+    index = NameIndex()
+    for file_info, suggestion in zip(file_infos, suggestions):
+        try:
+            files.append(resolve_name_collision(suggestion, file_info, index))
+        except Exception as e:
+            print(f"Error processing {file_info['filename']}: {str(e)}")
+            # Fall back to smart naming
+            files.append(smart_fallback_naming(file_info))
+    
+    print(f"Rate limiter waited {rate_limiter.wait_time:.1f}s in total ({rate_limiter.retries} retries)")
+    print(f"Tokens: {rate_limiter.input_tokens} input, {rate_limiter.output_tokens} output, "
+          f"{rate_limiter.cache_read_tokens} cache read, {rate_limiter.cache_write_tokens} cache write")
+    if cascade is not None:
+        print(cascade.report())
+    if cache is not None:
+        print(f"Suggestion cache: {cache.hits} hits, {cache.misses} misses")
+    if checkpoint is not None and checkpoint.resumed:
+        print(f"Resumed {checkpoint.resumed} suggestions from the checkpoint")
+    return files
+
+def default_batch_job_path(directory):
+    """Return where a --batch-submit job for directory is recorded."""
+    return os.path.join(directory, ".claude_renamer_batch.json")
+
+def submit_message_batch(summaries, client, job_path, directory, *, cache=None, refresh=False, model=CLAUDE_MODEL,
+                         preview_tokens=DEFAULT_PREVIEW_TOKENS):
+    """Send one naming request per file to model as an offline Message Batches job.
+
+    summaries may be a list or a generator from iter_directory_summaries.
+    The batch id and the mapping from request ids back to files are written
+    to job_path so collect_message_batch can apply the results later. Files
+    already in the suggestion cache are stored with the job instead of sent.
+    """
+    doc_forms_str = ', '.join([f"{k} ({v})" for k, v in DOCUMENT_FORMS.items()])
+    requests = []
+    job_files = {}
+    
+    instructions = single_file_instructions(doc_forms_str)
+    # Batch jobs are already discounted, so every file goes straight to one model
+    single_model = ModelCascade([model])
+    for i, file_info in enumerate(summaries):
+        custom_id = f"file-{i}"
+        entry = {
+            "index": i,
+            "src_path": file_info["src_path"],
+            "filename": file_info["filename"],
+            "extension": file_info["extension"],
+            "full_path": file_info["full_path"],
+        }
+        job_files[custom_id] = entry
+        
+        if cache is not None:
+            key, cached = get_cached_suggestion(file_info, cache, refresh=refresh, cascade=single_model,
+                                                preview_tokens=preview_tokens)
+            entry["cache_key"] = key
+            if cached is not None:
+                entry["suggestion"] = cached
+                continue
+        
+        requests.append({"custom_id": custom_id, "params": message_params(instructions, build_naming_prompt(file_info),
+                                                                           SUGGESTION_MAX_TOKENS, model)})
+    
+    if not job_files:
+        print("No files found to submit. Try adding some files to the directory.")
+        return None
+    
+    job = {
+        "batch_id": None,
+        "directory": os.path.abspath(directory),
+        "created": datetime.datetime.now().isoformat(),
+        "files": job_files,
+    }
+    if requests:
+        batch = client.messages.batches.create(requests=requests)
+        job["batch_id"] = batch.id
+    
+    # Write the job atomically so an interrupted run never leaves half a file behind,
+    # and before anything else can fail, so a paid-for batch can always be collected
+    tmp_path = f"{job_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, job_path)
+    if requests:
+        print(f"Submitted batch {job['batch_id']} with {len(requests)} requests "
+              f"({len(job_files) - len(requests)} files served from cache)")
+    else:
+        print("All files were served from cache; nothing to submit.")
+    print(f"Batch job saved to {job_path}. Run again with --batch-collect to apply the results.")
+    return job
+
+def collect_message_batch(client, job_path, *, wait=False, poll_interval=60, cache=None):
+    """Fetch the results of a submitted batch job and turn them into rename entries.
+
+    Returns None while the batch is still processing, unless wait is set, in
+    which case the batch is polled every poll_interval seconds until it ends.
+    Requests that failed or could not be parsed get smart fallback naming.
+    """
+    with open(job_path) as f:
+        job = json.load(f)
+    
+    batch_id = job["batch_id"]
+    if batch_id:
+        while True:
+            batch = client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                break
+            counts = batch.request_counts
+            print(f"Batch {batch_id} is {batch.processing_status}: {counts.succeeded} succeeded, {counts.errored} errored, {counts.processing} processing")
+            if not wait:
+                return None
+            time.sleep(poll_interval)
+    
+    entries = sorted(job["files"].values(), key=lambda entry: entry["index"])
+    suggestions = {entry["index"]: entry["suggestion"] for entry in entries if "suggestion" in entry}
+    
+    if batch_id:
+        for result in client.messages.batches.results(batch_id):
+            entry = job["files"].get(result.custom_id)
+            if entry is None:
+                continue
+            if result.result.type != "succeeded":
+                print(f"Batch request for {entry['filename']} {result.result.type}")
+                continue
+            try:
+                suggestion = parse_naming_response(result.result.message.content[0].text, entry)
+            except Exception as e:
+                print(f"Error parsing batch result for {entry['filename']}: {str(e)}")
+                continue
+            suggestions[entry["index"]] = suggestion
+            cache_suggestion(cache, entry.get("cache_key"), suggestion)
+    
+    files = []
+    index = NameIndex()
+    for entry in entries:
+        suggestion = suggestions.get(entry["index"]) or smart_fallback_naming(entry)
+        try:
+            files.append(resolve_name_collision(suggestion, entry, index))
+        except Exception as e:
+            print(f"Error processing {entry['filename']}: {str(e)}")
+            files.append(smart_fallback_naming(entry))
+    return files
+
+def record_rename(manifest, file, new_path):
+    """Record a renamed file in the manifest under its new relative path."""
+    relative_dir = os.path.dirname(file["src_path"])
+    new_relative_path = f"{relative_dir}/{file['new_name']}" if relative_dir else file["new_name"]
+    stat = os.stat(new_path)
+    manifest.record(new_relative_path, stat.st_size, stat.st_mtime, hash_file(new_path),
+                    {"new_name": file["new_name"], "reason": file.get("reason")}, old_path=file["src_path"])
+
+def apply_renames(src_dir, files, *, manifest=None, journal=None, metrics=None):
+    """Rename files in place through the rename journal and record them in the manifest.
+
+    Returns the new path of each file, or None where it could not be renamed.
+    Without a journal the files are renamed one by one with no way to undo.
+    """
+    start = time.perf_counter()
+    renames = []
+    for file in files:
+        src_path = os.path.join(src_dir, file["src_path"])
+        renames.append((src_path, os.path.join(os.path.dirname(src_path), file["new_name"])))
+    
+    if journal is not None:
+        errors = journal.apply(renames)
+    else:
+        errors = []
+        for src_path, new_path in renames:
+            try:
+                if os.path.exists(new_path) and new_path != src_path:
+                    raise FileExistsError(f"A file with the name {os.path.basename(new_path)} already exists.")
+                os.rename(src_path, new_path)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+    
+    results = []
+    for file, (src_path, new_path), error in zip(files, renames, errors):
+        if error is not None:
+            print(f"Error renaming {src_path}: {str(error)}")
+            results.append(None)
+            continue
+        print(f"Renamed: {os.path.basename(src_path)} -> {file['new_name']}")
+        if manifest is not None:
+            try:
+                record_rename(manifest, file, new_path)
+            except Exception as e:
+                print(f"Could not record {file['new_name']} in the manifest: {str(e)}")
+        results.append(new_path)
+    if metrics is not None:
+        metrics.add("rename", time.perf_counter() - start)
+        metrics.count("renamed", sum(1 for new_path in results if new_path))
+        metrics.count("rename_errors", sum(1 for new_path in results if not new_path))
+    return results
+
+def rename_files(src_dir, files, auto_yes=False, *, manifest=None, journal=None, metrics=None):
+    """Rename files in place following the naming convention.
+
+    Each renamed file is recorded in the manifest, when one is given, so the
+    next run can skip it until it changes. With a journal every rename is
+    logged before it is made and the whole set is applied as one plan, so
+    chains and swaps of names are handled and the run can be undone.
+    """
+    print("\nProposed file renaming:")
+    print("======================")
+    
+    for file in files:
+        print(f"\nFrom: {file['src_path']}")
+        print(f"To:   {file['new_name']}")
+        if "reason" in file:
+            print(f"Reason: {file['reason']}")
+    
+    if not auto_yes:
+        proceed = input("\nProceed with renaming these files? (y/n): ").lower().strip()
+        if proceed != 'y':
+            print("Operation cancelled.")
+            return
+    
+    # Rename files in place
+    results = apply_renames(src_dir, files, manifest=manifest, journal=journal, metrics=metrics)
+    success_count = sum(1 for new_path in results if new_path)
+    error_count = len(results) - success_count
+    
+    if manifest is not None:
+        manifest.save()
+    print(f"\nRenamed {success_count} files successfully. {error_count} files failed.")
+
+def watch_directory(directory, client, workers=1, *, rate_limiter=None, cache=None, manifest=None,
+                    settle_time=5.0, poll_interval=2.0, journal=None, preview_tokens=DEFAULT_PREVIEW_TOKENS, cascade=None):
+    """Rename files dropped into a directory as they arrive, until interrupted with Ctrl-C.
+
+    New files are debounced by FolderWatcher, then extracted and analyzed by up
+    to workers threads with at most two files per worker queued. Renames are
+    applied on this thread, so each collision check sees every earlier rename,
+    and go through the rename journal when one is given. Renamed files are
+    ignored by the watcher until they change.
+    """
+    doc_forms_str = ', '.join([f"{k} ({v})" for k, v in DOCUMENT_FORMS.items()])
+    validator = NamingConventionValidator(DOCUMENT_FORMS)
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    watcher = FolderWatcher(directory, settle_time, poll_interval)
+    print(f"Watching {directory} for new files ({watcher.mode}). Press Ctrl-C to stop.")
+    
+    def process(path, file_size, file_mtime):
+        relative_path = os.path.basename(path)
+        extension = os.path.splitext(relative_path)[1].lower()
+        file_info = extract_summary(path, relative_path, extension, file_size, file_mtime, preview_tokens)
+        if file_info is None:
+            return None
+        
+        key, suggestion = (get_cached_suggestion(file_info, cache, cascade=cascade, preview_tokens=preview_tokens)
+                           if cache is not None else (None, None))
+        if suggestion is None:
+            print(f"Analyzing new file: {relative_path}")
+            suggestion = analyze_file(file_info, client, doc_forms_str, rate_limiter=rate_limiter, cascade=cascade)
+            cache_suggestion(cache, key, suggestion)
+        return file_info, suggestion
+    
+    def apply(futures):
+        resolved = []
+        index = NameIndex()
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error processing new file: {str(e)}")
+                continue
+            if result is None:
+                continue
+            file_info, suggestion = result
+            try:
+                suggestion = resolve_name_collision(suggestion, file_info, index)
+            except Exception as e:
+                print(f"Error processing {file_info['filename']}: {str(e)}")
+                suggestion = smart_fallback_naming(file_info)
+            resolved.append(suggestion)
+        for new_path in apply_renames(directory, resolved, manifest=manifest, journal=journal):
+            if new_path:
+                watcher.ignore(new_path)
+        if manifest is not None:
+            manifest.save()
+    
+    in_flight = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for ready in watcher.watch():
+            for path in ready:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Moved away before we got to it
+                if skip_reason(os.path.basename(path), stat.st_size, stat.st_mtime, validator, manifest):
+                    continue
+                
+                # Bound the queue so a burst of drops cannot pile up in memory
+                while len(in_flight) >= max(1, workers) * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    apply(done)
+                in_flight.add(executor.submit(process, path, stat.st_size, stat.st_mtime))
+            
+            done = {future for future in in_flight if future.done()}
+            in_flight -= done
+            apply(done)
+    except KeyboardInterrupt:
+        print("\nStopping watch...")
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+        watcher.close()
+
+class RenamePipeline:
+    """Asyncio engine that scans, extracts, analyzes, resolves and renames files as a stream.
+
+    Each stage runs as its own tasks connected by bounded queues, so memory
+    stays flat and a slow stage holds back the ones before it. Collisions are
+    resolved in scan order, and with rename set each file is renamed as soon
+    as its name is resolved. on_suggestion(index, file_info, suggestion) and
+    on_rename(index, suggestion, new_path) are called from the event loop as
+    results come in.
+    """
+
+    def __init__(self, client, directory, workers=4, *, extract_workers=None, rate_limiter=None, cache=None,
+                 refresh=False, manifest=None, rename=False, queue_size=16, on_suggestion=None, on_rename=None,
+                 checkpoint=None, journal=None, controller=None, metrics=None,
+                 preview_tokens=DEFAULT_PREVIEW_TOKENS, cascade=None):
+        self.client = client
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.refresh = refresh
+        self.manifest = manifest
+        self.rename = rename
+        self.queue_size = queue_size
+        self.on_suggestion = on_suggestion
+        self.on_rename = on_rename
+        self.checkpoint = checkpoint
+        self.journal = journal
+        self.controller = controller
+        self.metrics = metrics
+        self.preview_tokens = preview_tokens
+        self.cascade = cascade
+        self.doc_forms_str = ', '.join([f"{k} ({v})" for k, v in DOCUMENT_FORMS.items()])
+
+        # Statistics reported at the end of a run
+        self.renamed = 0
+        self.rename_errors = 0
+
+    async def run(self, candidates):
+        """Process candidates from iter_candidates and return the resolved suggestions in order."""
+        import asyncio  # Only the pipeline needs asyncio, so it is not loaded at startup
+        from concurrent.futures import ProcessPoolExecutor
+        loop = asyncio.get_running_loop()
+        extract_queue = asyncio.Queue(self.queue_size)
+        analyze_queue = asyncio.Queue(self.queue_size)
+        resolve_queue = asyncio.Queue(self.queue_size)
+        rename_queue = asyncio.Queue(self.queue_size)
+        
+        # Bounds how far scanning may run ahead of collision resolution, since
+        # results that arrive out of order wait in the resolve stage
+        window = asyncio.Semaphore(self.queue_size * 4)
+        files = []
+        # Workers still running in each stage; the last one to finish tells the next stage to stop
+        running = {"extract": self.extract_workers, "analyze": self.workers}
+        
+        async def scan():
+            # Listing directories blocks, which on a network share would stall every request in flight
+            scanned = iter(candidates)
+            index = 0
+            while self.controller is None or not self.controller.cancelled:
+                await window.acquire()
+                candidate = await loop.run_in_executor(None, next, scanned, None)
+                if candidate is None:
+                    break
+                await extract_queue.put((index, candidate))
+                index += 1
+            for _ in range(self.extract_workers):
+                await extract_queue.put(None)
+        
+        async def extract(executor):
+            while True:
+                item = await extract_queue.get()
+                if item is None:
+                    break
+                index, candidate = item
+                try:
+                    file_info = await loop.run_in_executor(executor, extract_summary, *candidate, self.preview_tokens)
+                    if file_info is not None:
+                        record_extract(file_info, self.metrics)
+                except Exception as e:
+                    print(f"Error processing {candidate[1]}: {str(e)}")
+                    file_info = None
+                await analyze_queue.put((index, file_info))
+            running["extract"] -= 1
+            if not running["extract"]:
+                for _ in range(self.workers):
+                    await analyze_queue.put(None)
+        
+        async def analyze():
+            while True:
+                item = await analyze_queue.get()
+                if item is None:
+                    break
+                index, file_info = item
+                suggestion = None
+                if file_info is not None and (self.controller is None or await self.controller.wait_async()):
+                    suggestion = await self._suggest(loop, index, file_info)
+                    file_info = {k: v for k, v in file_info.items() if k != "content"}
+                await resolve_queue.put((index, file_info, suggestion))
+            running["analyze"] -= 1
+            if not running["analyze"]:
+                await resolve_queue.put(None)
+        
+        async def resolve():
+            # Results arrive out of order; hold them until it is each file's turn
+            waiting = {}
+            next_index = 0
+            index = NameIndex()
+            while True:
+                item = await resolve_queue.get()
+                if item is None:
+                    break
+                waiting[item[0]] = item
+                while next_index in waiting:
+                    _, file_info, suggestion = waiting.pop(next_index)
+                    next_index += 1
+                    window.release()
+                    if suggestion is None:
+                        continue
+                    try:
+                        suggestion = resolve_name_collision(suggestion, file_info, index)
+                    except Exception as e:
+                        print(f"Error processing {file_info['filename']}: {str(e)}")
+                        suggestion = smart_fallback_naming(file_info)
+                    if not suggestion.get("claude_used"):
+                        count_event(self.metrics, "fallbacks")
+                    files.append(suggestion)
+                    if self.on_suggestion:
+                        self.on_suggestion(len(files) - 1, file_info, suggestion)
+                    if self.rename:
+                        await rename_queue.put((len(files) - 1, suggestion))
+            await rename_queue.put(None)
+        
+        async def rename():
+            finished = False
+            while not finished:
+                # Take every rename that is ready so the journal is synced once per batch
+                batch = [await rename_queue.get()]
+                while not rename_queue.empty():
+                    batch.append(rename_queue.get_nowait())
+                if batch[-1] is None:
+                    finished = True
+                    batch.pop()
+                if not batch:
+                    continue
+                # Renaming syncs the journal to disk, so keep it off the event loop
+                new_paths = await loop.run_in_executor(None, functools.partial(
+                    apply_renames, self.directory, [suggestion for _, suggestion in batch], manifest=self.manifest,
+                    journal=self.journal, metrics=self.metrics))
+                for (index, suggestion), new_path in zip(batch, new_paths):
+                    if new_path:
+                        self.renamed += 1
+                    else:
+                        self.rename_errors += 1
+                    if self.on_rename:
+                        self.on_rename(index, suggestion, new_path)
+            if self.manifest is not None:
+                await loop.run_in_executor(None, self.manifest.save)
+        
+        executor = ProcessPoolExecutor(max_workers=self.extract_workers) if self.extract_workers > 1 else None
+        tasks = [asyncio.ensure_future(stage) for stage in
+                 [scan(), rename(), resolve(), *(analyze() for _ in range(self.workers)),
+                  *(extract(executor) for _ in range(self.extract_workers))]]
+        try:
+            # A stage that fails would leave the others blocked on full queues, so stop them all
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if executor is not None:
+                executor.shutdown(wait=True)
+        
+        if self.controller is not None and self.controller.cancelled:
+            print(f"Analysis cancelled after {len(files)} files")
+        print(f"Rate limiter waited {self.rate_limiter.wait_time:.1f}s in total ({self.rate_limiter.retries} retries)")
+        print(f"Tokens: {self.rate_limiter.input_tokens} input, {self.rate_limiter.output_tokens} output, "
+              f"{self.rate_limiter.cache_read_tokens} cache read, {self.rate_limiter.cache_write_tokens} cache write")
+        if self.cascade is not None:
+            print(self.cascade.report())
+        if self.cache is not None:
+            print(f"Suggestion cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        if self.checkpoint is not None and self.checkpoint.resumed:
+            print(f"Resumed {self.checkpoint.resumed} suggestions from the checkpoint")
+        return files
+
+    async def _suggest(self, loop, index, file_info):
+        resumed = get_checkpointed_suggestion(file_info, self.checkpoint)
+        if resumed is not None:
+            print(f"Resuming with checkpointed suggestion for file {index+1}: {file_info['filename']}")
+            count_event(self.metrics, "resumed")
+            return resumed
+        
+        key = None
+        if self.cache is not None:
+            # Hashing and SQLite are blocking, so keep them off the event loop
+            key, cached = await loop.run_in_executor(None, functools.partial(
+                get_cached_suggestion, file_info, self.cache, refresh=self.refresh, cascade=self.cascade,
+                preview_tokens=self.preview_tokens))
+            if cached is not None:
+                print(f"Using cached suggestion for file {index+1}: {file_info['filename']}")
+                count_event(self.metrics, "cache_hits")
+                return cached
+        
+        print(f"Analyzing file {index+1}: {file_info['filename']}")
+        suggestion = await create_claude_naming_suggestion_async(file_info, self.client, self.doc_forms_str,
+                                                                 rate_limiter=self.rate_limiter, metrics=self.metrics,
+                                                                 cascade=self.cascade)
+        count_event(self.metrics, "analyzed")
+        if key is not None:
+            await loop.run_in_executor(None, cache_suggestion, self.cache, key, suggestion)
+        checkpoint_suggestion(self.checkpoint, file_info, suggestion)
+        return suggestion
@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Stages of a run, in pipeline order
+STAGES = ("scan", "extract", "prompt", "api", "parse", "rename")
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    rank = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[rank]
+
+class RunMetrics:
+    """Timing spans and event counts for one run, shared between threads.
+
+    Each stage (scan, extract, prompt, api, parse, rename) records the
+    duration of every unit of work it does, so the summary can show where a
+    slow run spent its time. Events such as cache hits and fallback names are
+    counted alongside. The summary also includes the token counts and retries
+    kept by the run's rate limiter, and can be written as JSON or as a
+    Prometheus textfile for node_exporter's textfile collector.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._durations = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage, seconds):
+        """Record one unit of work in a stage that took seconds."""
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+
+    def count(self, event, n=1):
+        with self._lock:
+            self._counts[event] = self._counts.get(event, 0) + n
+
+    def summary(self, rate_limiter=None):
+        """Return the run's stage timings, events and token usage as a dict."""
+        with self._lock:
+            durations = {stage: sorted(values) for stage, values in self._durations.items()}
+            events = dict(self._counts)
+        stages = {}
+        for stage in sorted(durations, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            values = durations[stage]
+            stages[stage] = {
+                "count": len(values),
+                "total_s": sum(values),
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        summary = {
+            "started": self.started,
+            "wall_s": time.perf_counter() - self._start,
+            "stages": stages,
+            "events": events,
+        }
+        if rate_limiter is not None:
+            summary["events"]["retries"] = rate_limiter.retries
+            summary["rate_limit_wait_s"] = rate_limiter.wait_time
+            summary["tokens"] = {
+                "input": rate_limiter.input_tokens,
+                "output": rate_limiter.output_tokens,
+                "cache_read": rate_limiter.cache_read_tokens,
+                "cache_write": rate_limiter.cache_write_tokens,
+            }
+        return summary
+
+    def report(self, rate_limiter=None):
+        """Return the summary as lines of text for the console or the GUI log."""
+        summary = self.summary(rate_limiter)
+        lines = [f"Stage timings over {summary['wall_s']:.1f}s (count, total, p50 / p95 / p99):"]
+        for stage, stats in summary["stages"].items():
+            lines.append(f"  {stage:<8} {stats['count']:>6} {stats['total_s']:8.2f}s "
+                         f"{stats['p50_ms']:8.1f} / {stats['p95_ms']:.1f} / {stats['p99_ms']:.1f} ms")
+        if summary["events"]:
+            lines.append("Events: " + ", ".join(f"{count} {event}" for event, count in sorted(summary["events"].items())))
+        return lines
+
+    def write_json(self, path, rate_limiter=None):
+        write_atomically(path, json.dumps(self.summary(rate_limiter), indent=2) + "\n")
+
+    def write_prometheus(self, path, rate_limiter=None):
+        """Write the summary in the Prometheus text format, for the node_exporter textfile collector."""
+        summary = self.summary(rate_limiter)
+        lines = [
+            "# HELP claude_renamer_stage_seconds Duration of each unit of work per stage in the last run.",
+            "# TYPE claude_renamer_stage_seconds summary",
+        ]
+        for stage, stats in summary["stages"].items():
+            for quantile in ("50", "95", "99"):
+                lines.append(f'claude_renamer_stage_seconds{{stage="{stage}",quantile="0.{quantile}"}} '
+                             f'{stats[f"p{quantile}_ms"] / 1000:.6f}')
+            lines.append(f'claude_renamer_stage_seconds_sum{{stage="{stage}"}} {stats["total_s"]:.6f}')
+            lines.append(f'claude_renamer_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines += [
+            "# HELP claude_renamer_run_events Files and requests by outcome in the last run.",
+            "# TYPE claude_renamer_run_events gauge",
+        ]
+        lines += [f'claude_renamer_run_events{{event="{event}"}} {count}'
+                  for event, count in sorted(summary["events"].items())]
+        if "tokens" in summary:
+            lines += [
+                "# HELP claude_renamer_run_tokens Claude API tokens used in the last run.",
+                "# TYPE claude_renamer_run_tokens gauge",
+            ]
+            lines += [f'claude_renamer_run_tokens{{kind="{kind}"}} {count}' for kind, count in summary["tokens"].items()]
+        lines += [
+            "# HELP claude_renamer_run_wall_seconds Wall-clock duration of the last run.",
+            "# TYPE claude_renamer_run_wall_seconds gauge",
+            f"claude_renamer_run_wall_seconds {summary['wall_s']:.3f}",
+            "# HELP claude_renamer_run_start_time_seconds Unix time the last run started.",
+            "# TYPE claude_renamer_run_start_time_seconds gauge",
+            f"claude_renamer_run_start_time_seconds {summary['started']:.0f}",
+        ]
+        write_atomically(path, "\n".join(lines) + "\n")
+
+def write_atomically(path, text):
+    """Write text to path through a temporary file, so readers never see half of it."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
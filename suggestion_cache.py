@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default cache size - old entries are evicted once the stored suggestions exceed it
+DEFAULT_MAX_SIZE_MB = 50
+
+def default_cache_path():
+    """Return the cache database path under the XDG cache directory."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "claude_renamer", "suggestions.sqlite3")
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SuggestionCache:
+    """On-disk cache of Claude naming suggestions, shared between threads.
+
+    Entries are keyed by the file's content hash plus the prompt version
+    (including the preview budget) and model, so renaming a file keeps its
+    entry while a prompt, preview or model change invalidates it. When the stored suggestions grow past max_size_mb the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.path = path or default_cache_path()
+        self.max_size = int(max_size_mb * 1024 * 1024)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS suggestions (
+                key TEXT PRIMARY KEY,
+                suggestion TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS suggestions_last_used ON suggestions (last_used)")
+        self._conn.commit()
+
+        # Statistics reported at the end of a run
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_hash, prompt_version, model):
+        return f"{content_hash}:{prompt_version}:{model}"
+
+    def get(self, key):
+        """Return the cached suggestion for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT suggestion FROM suggestions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE suggestions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, suggestion):
+        """Store a suggestion and evict old entries if the cache is over its size limit."""
+        value = json.dumps(suggestion)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, suggestion, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM suggestions").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        # Drop least recently used entries until we are back under the limit
+        excess = total - self.max_size
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM suggestions ORDER BY last_used"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM suggestions WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from corpus import generate_corpus
+from mock_server import MockClaudeServer
+from claude_client import create_client
+from renamer_engine import collect_message_batch, iter_directory_summaries, submit_message_batch
+from suggestion_cache import SuggestionCache
+
+class MessageBatchTest(unittest.TestCase):
+    """Submit and collect offline batch jobs against the mock server's /v1/messages/batches endpoints."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "files")
+        generate_corpus(self.directory, 4, 4, ["csv", "png"])
+        self.job_path = os.path.join(self.tmp.name, "batch.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start_server(self, **options):
+        server = MockClaudeServer(latency=0, jitter=0, **options).start()
+        self.addCleanup(server.stop)
+        patcher = mock.patch.dict(os.environ, {"ANTHROPIC_BASE_URL": server.url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client = create_client("test")
+        self.addCleanup(client.close)
+        return server, client
+
+    def submit(self, client, cache=None):
+        # A generator, as passed by the command line
+        summaries = iter_directory_summaries(self.directory, 1)
+        return submit_message_batch(summaries, client, self.job_path, self.directory, cache=cache)
+
+    def test_submit_then_collect(self):
+        server, client = self.start_server()
+        job = self.submit(client)
+        self.assertIsNotNone(job["batch_id"])
+        with open(self.job_path) as f:
+            self.assertEqual(json.load(f)["batch_id"], job["batch_id"])
+        self.assertEqual(server.stats["batch_requests"], 4)
+
+        files = collect_message_batch(client, self.job_path)
+        self.assertEqual(len(files), 4)
+        self.assertTrue(all(file["claude_used"] for file in files))
+        self.assertEqual(len({file["new_name"] for file in files}), 4)
+
+    def test_collect_before_batch_ends(self):
+        _, client = self.start_server(batch_time=3600)
+        self.submit(client)
+        self.assertIsNone(collect_message_batch(client, self.job_path))
+
+    def test_failed_requests_get_fallback_names(self):
+        _, client = self.start_server(error_rate=1.0)
+        self.submit(client)
+        files = collect_message_batch(client, self.job_path)
+        self.assertEqual(len(files), 4)
+        self.assertFalse(any(file.get("claude_used") for file in files))
+
+    def test_cached_files_are_not_submitted(self):
+        server, client = self.start_server()
+        cache = SuggestionCache(os.path.join(self.tmp.name, "cache.sqlite3"))
+        self.addCleanup(cache.close)
+        self.submit(client, cache)
+        first = collect_message_batch(client, self.job_path, cache=cache)
+
+        job = self.submit(client, cache)
+        self.assertIsNone(job["batch_id"])
+        self.assertEqual(server.stats["batches"], 1)
+        second = collect_message_batch(client, self.job_path, cache=cache)
+        self.assertEqual([file["new_name"] for file in second], [file["new_name"] for file in first])
+
+if __name__ == "__main__":
+    unittest.main()
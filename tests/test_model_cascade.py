@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_cascade import ModelCascade
+
+class ShouldEscalateTest(unittest.TestCase):
+    """Each reason a suggestion moves up the cascade, and the cases where it stays."""
+
+    def setUp(self):
+        self.cascade = ModelCascade(["small", "large"], threshold=0.7, valid_forms=["RPT", "MIN"])
+
+    def result(self, **fields):
+        return {"claude_used": True, "document_form": "RPT", "confidence": 0.9, **fields}
+
+    def test_confident_answer_is_kept(self):
+        self.assertFalse(self.cascade.should_escalate(0, self.result()))
+
+    def test_parse_failure(self):
+        self.assertTrue(self.cascade.should_escalate(0, self.result(claude_used=False)))
+        self.assertTrue(self.cascade.should_escalate(0, {"new_name": "report.pdf"}))
+        self.assertTrue(self.cascade.should_escalate(0, self.result(claude_used=False), filename_only=True))
+
+    def test_unknown_form(self):
+        self.assertTrue(self.cascade.should_escalate(0, self.result(document_form="XYZ")))
+        self.assertTrue(self.cascade.should_escalate(0, self.result(document_form=None)))
+        self.assertTrue(self.cascade.should_escalate(0, self.result(document_form="XYZ"), filename_only=True))
+
+    def test_low_confidence(self):
+        self.assertTrue(self.cascade.should_escalate(0, self.result(confidence=0.5)))
+        self.assertTrue(self.cascade.should_escalate(0, self.result(confidence=None)))
+        self.assertFalse(self.cascade.should_escalate(0, self.result(confidence=0.7)))
+
+    def test_filename_only_files_are_not_escalated_on_confidence(self):
+        self.assertFalse(self.cascade.should_escalate(0, self.result(confidence=0.1), filename_only=True))
+        self.assertFalse(self.cascade.should_escalate(0, self.result(confidence=None), filename_only=True))
+
+    def test_last_tier_is_always_kept(self):
+        self.assertFalse(self.cascade.should_escalate(1, self.result(claude_used=False)))
+        self.assertFalse(ModelCascade(["large"]).should_escalate(0, self.result(confidence=0.1)))
+
+    def test_any_form_without_a_form_list(self):
+        cascade = ModelCascade(["small", "large"])
+        self.assertFalse(cascade.should_escalate(0, self.result(document_form="XYZ")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_index import NameIndex
+
+class NameIndexTest(unittest.TestCase):
+    """Reserve unique names in a temporary directory."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, *names):
+        for name in names:
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(name)
+
+    def test_same_stem_reserved_many_times(self):
+        index = NameIndex()
+        names = [index.reserve(self.directory, "Report", ".pdf") for _ in range(5)]
+        self.assertEqual(names, ["Report.pdf", "Report_1.pdf", "Report_2.pdf", "Report_3.pdf", "Report_4.pdf"])
+        self.assertIn(os.path.join(self.directory, "report_4.PDF"), index)
+
+    def test_names_on_disk_clash_case_insensitively(self):
+        self.make("report.PDF", "REPORT_1.pdf")
+        index = NameIndex()
+        self.assertEqual(index.reserve(self.directory, "Report", ".pdf"), "Report_2.pdf")
+        self.assertEqual(index.reserve(self.directory, "Report", ".pdf"), "Report_3.pdf")
+
+    def test_file_keeps_its_own_name(self):
+        self.make("Report.pdf")
+        index = NameIndex()
+        self.assertEqual(index.reserve(self.directory, "Report", ".pdf", current_name="report.pdf"), "Report.pdf")
+
+    def test_suffix_order_is_stable_across_runs(self):
+        # First run: three files get the same suggested name
+        sources = ["a.pdf", "b.pdf", "c.pdf"]
+        self.make(*sources)
+        index = NameIndex()
+        first = [index.reserve(self.directory, "Report", ".pdf", current_name=source) for source in sources]
+        for source, name in zip(sources, first):
+            os.rename(os.path.join(self.directory, source), os.path.join(self.directory, name))
+
+        # Second run over the renamed files, in the same order: nobody moves
+        index = NameIndex()
+        second = [index.reserve(self.directory, "Report", ".pdf", current_name=name) for name in first]
+        self.assertEqual(second, first)
+
+        # Nor in reverse order
+        index = NameIndex()
+        second = [index.reserve(self.directory, "Report", ".pdf", current_name=name) for name in reversed(first)]
+        self.assertEqual(second, list(reversed(first)))
+
+if __name__ == "__main__":
+    unittest.main()
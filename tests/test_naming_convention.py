@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naming_convention import NamingConventionValidator
+
+class NamingConventionValidatorTest(unittest.TestCase):
+    """Names that already follow Subject_Description_FRM_YYYYMMDD_Rev#.ext are left alone."""
+
+    def setUp(self):
+        self.validator = NamingConventionValidator({"RPT": "Report", "MIN": "Minutes"})
+
+    def test_conforming_name(self):
+        self.assertTrue(self.validator.matches("Finance_QuarterlyReport_RPT_20240131_Rev0.pdf"))
+
+    def test_unknown_form_code(self):
+        self.assertFalse(self.validator.matches("Finance_QuarterlyReport_XYZ_20240131_Rev0.pdf"))
+        self.assertFalse(self.validator.matches("Finance_QuarterlyReport_rpt_20240131_Rev0.pdf"))
+
+    def test_impossible_date(self):
+        self.assertFalse(self.validator.matches("Finance_QuarterlyReport_RPT_20240230_Rev0.pdf"))
+        self.assertTrue(self.validator.matches("Finance_QuarterlyReport_RPT_20240229_Rev0.pdf"))
+
+    def test_revisions(self):
+        self.assertTrue(self.validator.matches("Board_Meeting_MIN_20240131_RevA.docx"))
+        self.assertTrue(self.validator.matches("Board_Meeting_MIN_20240131_Rev12.docx"))
+        # Revision 12 with a collision suffix
+        self.assertTrue(self.validator.matches("Board_Meeting_MIN_20240131_Rev12_3.docx"))
+        self.assertFalse(self.validator.matches("Board_Meeting_MIN_20240131_RevAB.docx"))
+        self.assertFalse(self.validator.matches("Board_Meeting_MIN_20240131_Rev.docx"))
+
+    def test_double_extension(self):
+        self.assertFalse(self.validator.matches("Finance_QuarterlyReport_RPT_20240131_Rev0.pdf.pdf"))
+        self.assertFalse(self.validator.matches("Finance_QuarterlyReport_RPT_20240131_Rev0.tar.gz"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preview import build_preview, count_tokens, drop_boilerplate
+
+class DropBoilerplateTest(unittest.TestCase):
+    """Running headers, contents entries and page numbers never reach the preview."""
+
+    def test_header_repeated_on_two_pages(self):
+        lines = ["ACME Corp Confidential", "Annual Budget Review", "Body text.",
+                 "ACME Corp Confidential", "More body text."]
+        self.assertEqual(drop_boilerplate(lines), ["Annual Budget Review", "Body text.", "More body text."])
+
+    def test_footer_differing_only_in_digits(self):
+        lines = ["Report", "Revision 3 - printed 2024", "Body", "Revision 4 - printed 2024"]
+        self.assertEqual(drop_boilerplate(lines), ["Report", "Body"])
+
+    def test_contents_and_page_numbers(self):
+        lines = ["Table of Contents", "1. Introduction ........ 3", "Introduction", "7", "Page 2 of 9"]
+        self.assertEqual(drop_boilerplate(lines), ["Introduction"])
+
+class BuildPreviewTest(unittest.TestCase):
+
+    def test_header_is_not_taken_as_title(self):
+        text = "ACME Corp Confidential\nSite Survey\nBody.\n1\n\nACME Corp Confidential\nMore.\n2\n"
+        self.assertEqual(build_preview(text), "Site Survey\nBody.\nMore.")
+
+    def test_budget_keeps_title_and_date(self):
+        words = ["inlet", "valve", "motor", "seal", "pipe", "gauge", "panel", "filter"]
+        body = "\n".join(f"The {a} and {b} were checked against the drawings." for a in words for b in words)
+        text = "Pump Station Inspection\n" + body + "\nInspected on 2024-03-15 by the field team."
+        preview = build_preview(text, 60)
+        lines = preview.split("\n")
+        self.assertLessEqual(sum(count_tokens(line) + 1 for line in lines), 60)
+        self.assertEqual(lines[0], "Pump Station Inspection")
+        self.assertIn("2024-03-15", lines[-1])
+
+if __name__ == "__main__":
+    unittest.main()
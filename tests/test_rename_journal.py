@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rename_journal import RenameJournal, is_occupied, undo_renames
+
+class RenameJournalTest(unittest.TestCase):
+    """Apply, roll back and undo renames in a temporary directory."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.journal_path = os.path.join(self.directory, "journal.jsonl")
+        self.journal = RenameJournal(self.journal_path)
+        self.addCleanup(self.journal.close)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def make(self, *names):
+        for name in names:
+            with open(self.path(name), "w") as f:
+                f.write(name)
+
+    def contents(self):
+        """Map each file in the directory (except the journal) to the name it was created with."""
+        files = {}
+        for name in os.listdir(self.directory):
+            if name != "journal.jsonl":
+                with open(self.path(name)) as f:
+                    files[name] = f.read()
+        return files
+
+    def apply(self, *renames):
+        errors = self.journal.apply([(self.path(src), self.path(dst)) for src, dst in renames])
+        self.journal.close()
+        return errors
+
+    def test_swap_and_chain(self):
+        self.make("a", "b", "c", "d")
+        errors = self.apply(("a", "b"), ("b", "a"), ("c", "d"), ("d", "e"))
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(self.contents(), {"b": "a", "a": "b", "d": "c", "e": "d"})
+        self.assertEqual(self.journal.moves, 4)
+
+        self.assertEqual(undo_renames(self.journal_path), (4, 0))
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "c": "c", "d": "d"})
+
+    def test_unsafe_renames_are_rejected(self):
+        self.make("a", "b", "c", "taken")
+        errors = self.apply(("a", "taken"), ("b", "new"), ("c", "new"), ("missing", "other"))
+        self.assertIsInstance(errors[0], FileExistsError)
+        self.assertIsNone(errors[1])
+        self.assertIsInstance(errors[2], FileExistsError)
+        self.assertIsInstance(errors[3], FileNotFoundError)
+        self.assertEqual(self.contents(), {"a": "a", "new": "b", "c": "c", "taken": "taken"})
+
+    def test_failed_group_is_rolled_back(self):
+        self.make("a", "b", "c", "x")
+        real_rename = os.rename
+
+        def rename(src, dst):
+            # Fail the last move of the c chain, after a and b have already moved
+            if dst == self.path("d"):
+                raise PermissionError("read-only")
+            real_rename(src, dst)
+
+        with mock.patch("os.rename", side_effect=rename):
+            errors = self.apply(("a", "b"), ("b", "c"), ("c", "d"), ("x", "y"))
+        self.assertTrue(all(isinstance(error, PermissionError) for error in errors[:3]))
+        self.assertIsNone(errors[3])
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "c": "c", "y": "x"})
+        self.assertEqual(self.journal.moves, 1)
+
+        # Only the rename that stuck is undone; the rolled back group is left alone
+        self.assertEqual(undo_renames(self.journal_path), (1, 0))
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "c": "c", "x": "x"})
+
+    def test_interrupted_undo_can_be_run_again(self):
+        self.make("a", "b", "c")
+        self.apply(("a", "a2"), ("b", "b2"), ("c", "c2"))
+        real_rename = os.rename
+        calls = []
+
+        def rename(src, dst):
+            calls.append(src)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            real_rename(src, dst)
+
+        with mock.patch("os.rename", side_effect=rename):
+            with self.assertRaises(KeyboardInterrupt):
+                undo_renames(self.journal_path)
+        self.assertEqual(len(self.contents()), 3)
+
+        self.assertEqual(undo_renames(self.journal_path), (2, 0))
+        self.assertEqual(self.contents(), {"a": "a", "b": "b", "c": "c"})
+        self.assertEqual(undo_renames(self.journal_path), (0, 0))
+
+    def test_undo_leaves_reused_names_alone(self):
+        self.make("a")
+        self.apply(("a", "b"))
+        self.make("a")  # A new file took the old name after the run
+        self.assertEqual(undo_renames(self.journal_path), (0, 1))
+        self.assertEqual(self.contents(), {"a": "a", "b": "a"})
+
+    def test_case_only_rename(self):
+        self.make("Report.txt")
+        self.assertEqual(self.apply(("Report.txt", "report.txt")), [None])
+        self.assertEqual(self.contents(), {"report.txt": "Report.txt"})
+        self.assertEqual(undo_renames(self.journal_path), (1, 0))
+        self.assertEqual(self.contents(), {"Report.txt": "Report.txt"})
+
+    def test_same_file_is_not_occupied(self):
+        # On case-insensitive file systems "report" and "Report" are one file, like a hard link
+        self.make("a", "b")
+        os.link(self.path("a"), self.path("a_link"))
+        self.assertFalse(is_occupied(self.path("a"), self.path("a_link")))
+        self.assertTrue(is_occupied(self.path("a"), self.path("b")))
+        self.assertFalse(is_occupied(self.path("a"), self.path("missing")))
+
+    def test_case_only_rename_on_case_insensitive_file_system(self):
+        self.make("Report.txt")
+        def lexists(path):
+            # Answer like a case-insensitive file system would
+            name = os.path.basename(path).lower()
+            return any(existing.lower() == name for existing in os.listdir(os.path.dirname(path)))
+
+        def samefile(src, dst):
+            return src.lower() == dst.lower()
+
+        with mock.patch("os.path.lexists", side_effect=lexists), mock.patch("os.path.samefile", side_effect=samefile):
+            self.assertEqual(self.apply(("Report.txt", "report.txt")), [None])
+        self.assertEqual(self.contents(), {"report.txt": "Report.txt"})
+
+if __name__ == "__main__":
+    unittest.main()
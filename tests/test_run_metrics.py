@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_metrics import RunMetrics, percentile
+
+class PercentileTest(unittest.TestCase):
+    """Nearest-rank percentiles, including counts where fraction * n is a whole number."""
+
+    def test_nearest_rank(self):
+        self.assertEqual(percentile([1, 2], 0.50), 1)
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6], 0.50), 3)
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6, 7], 0.50), 4)
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+        self.assertEqual(percentile(list(range(1, 101)), 0.99), 99)
+        self.assertEqual(percentile(list(range(1, 11)), 0.95), 10)
+
+    def test_bounds(self):
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertEqual(percentile([1, 2, 3], 0.0), 1)
+        self.assertEqual(percentile([1, 2, 3], 1.0), 3)
+
+    def test_summary_uses_stage_durations(self):
+        metrics = RunMetrics()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            metrics.add("api", seconds)
+        stats = metrics.summary()["stages"]["api"]
+        self.assertEqual(stats["count"], 4)
+        self.assertAlmostEqual(stats["p50_ms"], 200.0)
+        self.assertAlmostEqual(stats["max_ms"], 400.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_cascade import ModelCascade
+from renamer_engine import cache_suggestion, get_cached_suggestion
+from suggestion_cache import SuggestionCache
+
+class CachedSuggestionTest(unittest.TestCase):
+    """Cache lookups are keyed by content, prompt version, model and preview budget."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SuggestionCache(os.path.join(self.tmp.name, "cache.sqlite3"))
+        path = os.path.join(self.tmp.name, "report.txt")
+        with open(path, "w") as f:
+            f.write("Quarterly report")
+        self.file_info = {"full_path": path, "src_path": "report.txt", "filename": "report.txt"}
+        self.suggestion = {"new_name": "Finance_QuarterlyReport_RPT_20240101_Rev0.txt", "reason": "Report",
+                           "claude_used": True}
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def store(self, **options):
+        key, cached = get_cached_suggestion(self.file_info, self.cache, **options)
+        self.assertIsNone(cached)
+        cache_suggestion(self.cache, key, self.suggestion)
+
+    def test_hit_with_same_options(self):
+        self.store(preview_tokens=300)
+        _, cached = get_cached_suggestion(self.file_info, self.cache, preview_tokens=300)
+        self.assertEqual(cached["new_name"], self.suggestion["new_name"])
+        self.assertEqual(cached["src_path"], "report.txt")
+
+    def test_preview_budget_is_part_of_the_key(self):
+        self.store(preview_tokens=300)
+        _, cached = get_cached_suggestion(self.file_info, self.cache, preview_tokens=600)
+        self.assertIsNone(cached)
+
+    def test_model_cascade_is_part_of_the_key(self):
+        self.store(cascade=ModelCascade(["small", "large"]))
+        _, cached = get_cached_suggestion(self.file_info, self.cache, cascade=ModelCascade(["large"]))
+        self.assertIsNone(cached)
+
+    def test_refresh_skips_the_cached_entry(self):
+        self.store()
+        key, cached = get_cached_suggestion(self.file_info, self.cache, refresh=True)
+        self.assertIsNone(cached)
+        self.assertIsNotNone(key)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import time
+
+# inotify is optional; without it the folder is polled
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+class FolderWatcher:
+    """Report files dropped into a folder once they have stopped changing.
+
+    Uses inotify when the inotify_simple package is installed and falls back to
+    polling the folder with os.scandir otherwise. A file is only reported after
+    its size and mtime have stayed the same for settle_time seconds, so files
+    that are still being written by a scanner or mail rule are not picked up
+    half-finished. Only files currently in the folder are tracked, so memory
+    stays flat however long the watcher runs.
+    """
+
+    def __init__(self, directory, settle_time=5.0, poll_interval=2.0, use_inotify=True):
+        self.directory = directory
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+
+        self._pending = {}  # path -> ((size, mtime), time of last change)
+        self._reported = {}  # path -> (size, mtime) when it was reported
+        self._inotify = None
+        if use_inotify and inotify_simple is not None:
+            self._inotify = inotify_simple.INotify()
+            flags = inotify_simple.flags
+            self._inotify.add_watch(
+                directory, flags.CREATE | flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE)
+
+        # Files already in the folder are treated as new drops
+        self._scan()
+
+    @property
+    def mode(self):
+        return "inotify" if self._inotify else "polling"
+
+    def _stat(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _note(self, path, signature, now):
+        if self._reported.get(path) == signature:
+            return
+        pending = self._pending.get(path)
+        if pending is None or pending[0] != signature:
+            self._pending[path] = (signature, now)
+
+    def _scan(self):
+        now = time.monotonic()
+        present = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                present.add(entry.path)
+                stat = entry.stat()
+                self._note(entry.path, (stat.st_size, stat.st_mtime), now)
+
+        # Forget files that have been moved away so nothing accumulates
+        self._reported = {path: signature for path, signature in self._reported.items() if path in present}
+        self._pending = {path: pending for path, pending in self._pending.items() if path in present}
+
+    def _wait_for_changes(self):
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            self._scan()
+            return
+
+        events = self._inotify.read(timeout=int(self.poll_interval * 1000))
+        now = time.monotonic()
+        for event in events:
+            if event.mask & inotify_simple.flags.Q_OVERFLOW:
+                # Events were dropped; fall back to a full scan
+                self._scan()
+                continue
+            if not event.name:
+                continue
+            path = os.path.join(self.directory, event.name)
+            if event.mask & (inotify_simple.flags.MOVED_FROM | inotify_simple.flags.DELETE):
+                self._pending.pop(path, None)
+                self._reported.pop(path, None)
+                continue
+            signature = self._stat(path)
+            if signature is not None:
+                self._note(path, signature, now)
+
+    def _settled(self):
+        """Return pending files that have not changed for settle_time seconds."""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed) in list(self._pending.items()):
+            current = self._stat(path)
+            if current is None:
+                del self._pending[path]
+            elif current != signature:
+                self._pending[path] = (current, now)
+            elif now - changed >= self.settle_time:
+                del self._pending[path]
+                self._reported[path] = current
+                ready.append(path)
+        return sorted(ready)
+
+    def ignore(self, path):
+        """Treat a file as already reported, e.g. one we just renamed, until it changes."""
+        signature = self._stat(path)
+        self._pending.pop(path, None)
+        if signature is not None:
+            self._reported[path] = signature
+
+    def watch(self):
+        """Yield a list of settled file paths after every poll, possibly empty, forever."""
+        while True:
+            yield self._settled()
+            self._wait_for_changes()
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()